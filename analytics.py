@@ -0,0 +1,248 @@
+# --- VERSION & IDENTITY ---
+# MANAGER_VERSION = "v4.4.5 (Stable Release)"
+
+# analytics.py
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+import constants
+import logger
+import logic
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    steamid TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT 'Unknown',
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    playtime REAL NOT NULL DEFAULT 0,
+    sessions INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    steamid TEXT NOT NULL,
+    join_time REAL NOT NULL,
+    leave_time REAL
+);
+CREATE TABLE IF NOT EXISTS name_changes (
+    id INTEGER PRIMARY KEY,
+    steamid TEXT NOT NULL,
+    old_name TEXT,
+    new_name TEXT,
+    changed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE INDEX IF NOT EXISTS idx_players_last_seen ON players(last_seen);
+CREATE INDEX IF NOT EXISTS idx_players_playtime ON players(playtime);
+CREATE INDEX IF NOT EXISTS idx_players_name ON players(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_sessions_player ON sessions(steamid, join_time);
+CREATE INDEX IF NOT EXISTS idx_sessions_open ON sessions(steamid) WHERE leave_time IS NULL;
+"""
+
+ORDER_BY = {
+    'last_seen': "last_seen DESC",
+    'playtime': "playtime DESC",
+    'name': "name COLLATE NOCASE",
+}
+
+def to_epoch(value):
+    """Accepts epoch floats or the legacy str(datetime.now()) strings."""
+    if isinstance(value, (int, float)): return float(value)
+    try: return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError: return time.time()
+
+def format_time(epoch):
+    return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M") if epoch else "?"
+
+class PlayerDatabase:
+    """
+    SQLite (WAL) store for players, sessions and name changes.
+    The LogReader only queues operations; flush() swaps the queue out and applies it in one
+    transaction on the flusher thread, so record_*() never waits on disk. Queries open a per-thread connection so the UI never waits on writes.
+    """
+    def __init__(self, path=None):
+        self.path = path or constants.PLAYER_DB_FILE
+        self._pending = []
+        self._lock = threading.Lock() # Guards _pending only
+        self._write_lock = threading.Lock() # Serializes flushes on the writer connection
+        self._local = threading.local()
+        self._writer = sqlite3.connect(self.path, check_same_thread=False)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writer.executescript(SCHEMA)
+        self._close_stale_sessions()
+
+    def _reader(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    # --- WRITES (queued) ---
+    def record_sighting(self, steamid, name=None, ts=None):
+        self._queue('seen', steamid, name, ts or time.time())
+
+    def record_join(self, steamid, name=None, ts=None):
+        self._queue('join', steamid, name, ts or time.time())
+
+    def record_leave(self, steamid=None, name=None, ts=None):
+        """Closes the player's open session. Falls back to name lookup when no SteamID is logged."""
+        self._queue('leave', steamid, name, ts or time.time())
+
+    def close_all_sessions(self, ts=None):
+        """Server stopped/crashed: everyone is offline."""
+        self._queue('close_all', None, None, ts or time.time())
+
+    def _queue(self, op, steamid, name, ts):
+        with self._lock:
+            self._pending.append((op, steamid, name, ts))
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                if not self._pending: return
+                batch, self._pending = self._pending, []
+            try:
+                with self._writer:
+                    for op, steamid, name, ts in batch:
+                        if op == 'close_all': self._close_sessions(ts)
+                        elif op == 'leave': self._apply_leave(steamid, name, ts)
+                        else:
+                            self._apply_sighting(steamid, name, ts)
+                            if op == 'join': self._apply_join(steamid, ts)
+            except sqlite3.Error as e:
+                # Transaction rolled back: put the batch back in front of anything queued since
+                logger.debug(f"Player DB flush failed ({len(batch)} ops, requeued): {e}")
+                with self._lock: self._pending[:0] = batch
+
+    def run_flusher(self):
+        while True:
+            time.sleep(constants.HISTORY_FLUSH_INTERVAL)
+            self.flush()
+
+    def _apply_sighting(self, steamid, name, ts):
+        c = self._writer
+        row = c.execute("SELECT name FROM players WHERE steamid=?", (steamid,)).fetchone()
+        if row is None:
+            c.execute("INSERT INTO players (steamid, name, first_seen, last_seen) VALUES (?,?,?,?)",
+                      (steamid, name or 'Unknown', ts, ts))
+            return
+        c.execute("UPDATE players SET first_seen=MIN(first_seen, ?), last_seen=MAX(last_seen, ?) WHERE steamid=?",
+                  (ts, ts, steamid))
+        if name and name != row[0]:
+            c.execute("UPDATE players SET name=? WHERE steamid=?", (name, steamid))
+            if row[0] != 'Unknown':
+                c.execute("INSERT INTO name_changes (steamid, old_name, new_name, changed_at) VALUES (?,?,?,?)",
+                          (steamid, row[0], name, ts))
+
+    def _apply_join(self, steamid, ts):
+        c = self._writer
+        if c.execute("SELECT 1 FROM sessions WHERE steamid=? AND leave_time IS NULL", (steamid,)).fetchone(): return
+        c.execute("INSERT INTO sessions (steamid, join_time) VALUES (?,?)", (steamid, ts))
+        c.execute("UPDATE players SET sessions=sessions+1 WHERE steamid=?", (steamid,))
+
+    def _apply_leave(self, steamid, name, ts):
+        c = self._writer
+        if not steamid and name:
+            row = c.execute("SELECT s.steamid FROM sessions s JOIN players p ON p.steamid=s.steamid "
+                            "WHERE s.leave_time IS NULL AND p.name=?", (name,)).fetchone()
+            steamid = row[0] if row else None
+        if not steamid: return
+        self._close_sessions(ts, steamid)
+        c.execute("UPDATE players SET last_seen=MAX(last_seen, ?) WHERE steamid=?", (ts, steamid))
+
+    def _close_sessions(self, ts, steamid=None):
+        c = self._writer
+        where, args = ("leave_time IS NULL AND steamid=?", (steamid,)) if steamid else ("leave_time IS NULL", ())
+        for sid, joined in c.execute(f"SELECT steamid, join_time FROM sessions WHERE {where}", args).fetchall():
+            c.execute("UPDATE players SET playtime=playtime+? WHERE steamid=?", (max(0.0, ts - joined), sid))
+        c.execute(f"UPDATE sessions SET leave_time=MAX(join_time, ?) WHERE {where}", (ts,) + args)
+
+    def _close_stale_sessions(self):
+        """Sessions left open by a previous manager run end at the player's last sighting."""
+        with self._writer:
+            stale = self._writer.execute("SELECT s.steamid, s.join_time, p.last_seen FROM sessions s "
+                                         "JOIN players p ON p.steamid=s.steamid WHERE s.leave_time IS NULL").fetchall()
+            for sid, joined, last in stale:
+                self._close_sessions(max(joined, last), sid)
+
+    # --- MIGRATION ---
+    def import_legacy_history(self, history):
+        """One-off import of the old {steamid: {name, first_seen, last_seen}} JSON history."""
+        with self._write_lock, self._writer:
+            if self._writer.execute("SELECT value FROM meta WHERE key='legacy_imported'").fetchone(): return 0
+            rows = [(sid, d.get('name') or 'Unknown', to_epoch(d.get('first_seen')), to_epoch(d.get('last_seen', d.get('first_seen'))))
+                    for sid, d in history.items()]
+            self._writer.executemany("INSERT OR IGNORE INTO players (steamid, name, first_seen, last_seen) VALUES (?,?,?,?)", rows)
+            self._writer.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)", (str(datetime.now()),))
+        return len(rows)
+
+    def merge_history(self, rows):
+        """Bulk-merges [(steamid, name, first_seen, last_seen)] keeping the earliest first_seen,
+        the latest last_seen and the name seen last. Used by the log backfill."""
+        with self._write_lock, self._writer:
+            self._writer.executemany(
+                "INSERT INTO players (steamid, name, first_seen, last_seen) VALUES (?,?,?,?) "
+                "ON CONFLICT(steamid) DO UPDATE SET "
+                "name=CASE WHEN excluded.last_seen >= last_seen AND excluded.name != 'Unknown' THEN excluded.name ELSE name END, "
+                "first_seen=MIN(first_seen, excluded.first_seen), last_seen=MAX(last_seen, excluded.last_seen)",
+                [(sid, name or 'Unknown', first, last) for sid, name, first, last in rows])
+        return len(rows)
+
+    # --- QUERIES ---
+    def _filter_sql(self, text, since_days, online_only):
+        where, args = [], []
+        text = (text or "").strip()
+        if text:
+            if text.isdigit():
+                # SteamID prefix -> primary key range scan
+                where.append("steamid >= ? AND steamid < ?"); args += [text, text + ":"]
+            else:
+                where.append("name LIKE ? ESCAPE '\\'")
+                args.append(text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        if since_days:
+            where.append("last_seen >= ?"); args.append(time.time() - float(since_days) * 86400)
+        if online_only:
+            where.append("steamid IN (SELECT steamid FROM sessions WHERE leave_time IS NULL)")
+        return (" WHERE " + " AND ".join(where)) if where else "", args
+
+    def count_players(self, text=None, since_days=None, online_only=False):
+        where, args = self._filter_sql(text, since_days, online_only)
+        return self._reader().execute(f"SELECT COUNT(*) FROM players{where}", args).fetchone()[0]
+
+    def query_players(self, text=None, since_days=None, online_only=False, order='last_seen', limit=100, offset=0):
+        """Returns [(steamid, name, first_seen, last_seen, playtime_seconds, sessions)]."""
+        where, args = self._filter_sql(text, since_days, online_only)
+        sql = (f"SELECT steamid, name, first_seen, last_seen, playtime, sessions FROM players{where} "
+               f"ORDER BY {ORDER_BY.get(order, ORDER_BY['last_seen'])} LIMIT ? OFFSET ?")
+        return self._reader().execute(sql, args + [int(limit), int(offset)]).fetchall()
+
+    def online_players(self):
+        """Returns [(steamid, name, join_time)] for open sessions."""
+        return self._reader().execute("SELECT s.steamid, p.name, s.join_time FROM sessions s JOIN players p "
+                                      "ON p.steamid=s.steamid WHERE s.leave_time IS NULL ORDER BY s.join_time").fetchall()
+
+    def peak_concurrency(self, since_ts):
+        """Highest number of simultaneous sessions since `since_ts` (sweep over session edges)."""
+        rows = self._reader().execute("SELECT join_time, COALESCE(leave_time, ?) FROM sessions "
+                                      "WHERE COALESCE(leave_time, ?) >= ?", (time.time(), time.time(), since_ts)).fetchall()
+        edges = sorted([(max(j, since_ts), 1) for j, _ in rows] + [(l, -1) for _, l in rows])
+        peak = current = 0
+        for _, delta in edges:
+            current += delta
+            peak = max(peak, current)
+        return peak
+
+def open_player_database():
+    """Opens the store and imports player_history.json (+ journal) on first run."""
+    db = PlayerDatabase()
+    try:
+        if os.path.exists(constants.HISTORY_FILE) or os.path.exists(constants.HISTORY_JOURNAL_FILE):
+            imported = db.import_legacy_history(logic.PlayerHistoryJournal().load())
+            if imported: logger.event("ANALYTICS", f"Imported {imported} players from legacy history.")
+    except Exception as e:
+        logger.debug(f"Legacy player history import failed: {e}")
+    return db
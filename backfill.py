@@ -0,0 +1,114 @@
+# --- VERSION & IDENTITY ---
+# MANAGER_VERSION = "v4.4.5 (Stable Release)"
+
+# backfill.py
+# Offline indexer: scans old Vein*.log files into the player database.
+# Usage: python backfill.py <folder or .log file> [...]
+import os
+import re
+import sys
+import mmap
+import glob
+import time
+import calendar
+from concurrent.futures import ProcessPoolExecutor
+import logger
+import logic
+
+CHUNK_SIZE = 64 * 1024 * 1024  # Large files are split on line boundaries into chunks this size
+STEAM_SCAN = re.compile(rb'[Ii][Dd][:\s=]+7656\d{13}')
+UE_TIMESTAMP = re.compile(r'^\[(\d{4})\.(\d{2})\.(\d{2})-(\d{2})\.(\d{2})\.(\d{2})')
+
+_classifier = None
+
+def find_log_files(folder):
+    """Vein.log plus Unreal's rotated Vein-backup-*.log files, recursively."""
+    return sorted(glob.glob(os.path.join(folder, '**', 'Vein*.log'), recursive=True))
+
+def _line_time(line, fallback):
+    # Unreal stamps log lines in UTC: [YYYY.MM.DD-HH.MM.SS:mmm]
+    m = UE_TIMESTAMP.match(line)
+    if not m: return fallback
+    try: return float(calendar.timegm(tuple(int(g) for g in m.groups()) + (0, 0, 0)))
+    except ValueError: return fallback
+
+def _split_file(path, size):
+    """[(path, start, end)] with every boundary on a line start."""
+    if size <= CHUNK_SIZE: return [(path, 0, size)]
+    chunks, start = [], 0
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        while start < size:
+            nl = mm.find(b'\n', min(start + CHUNK_SIZE, size) - 1)
+            end = size if nl == -1 else nl + 1
+            chunks.append((path, start, end))
+            start = end
+    return chunks
+
+def scan_chunk(task):
+    """Worker: {steamid: [first_ts, last_ts, name]} for one mmapped byte range."""
+    global _classifier
+    if _classifier is None: _classifier = logic.LogClassifier()
+    path, start, end = task
+    found = {}
+    fallback = os.path.getmtime(path)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Cheap byte-level scan; only lines containing a SteamID are decoded and classified
+        for m in STEAM_SCAN.finditer(mm, start, end):
+            ls = mm.rfind(b'\n', start, m.start()) + 1 or start
+            le = mm.find(b'\n', m.end(), end)
+            line = mm[ls:le if le != -1 else end].decode('utf-8', errors='ignore')
+            ev = _classifier.classify(line) # Same rules as the live LogReader
+            if not ev or not ev.steamid: continue
+            sid, ts = ev.steamid, _line_time(line, fallback)
+            entry = found.get(sid)
+            if entry is None: found[sid] = [ts, ts, ev.name]
+            else:
+                if ts < entry[0]: entry[0] = ts
+                if ts >= entry[1]:
+                    entry[1] = ts
+                    if ev.name: entry[2] = ev.name
+    return found
+
+def backfill(paths, db, workers=None):
+    """Scans `paths` in parallel and merges results into `db`. Returns a summary dict."""
+    started = time.perf_counter()
+    tasks, total_bytes = [], 0
+    for p in paths:
+        try: size = os.path.getsize(p)
+        except OSError: continue
+        if size == 0: continue
+        total_bytes += size
+        tasks.extend(_split_file(p, size))
+
+    merged = {}
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            for found in pool.map(scan_chunk, tasks):
+                for sid, (first, last, name) in found.items():
+                    entry = merged.get(sid)
+                    if entry is None: merged[sid] = [first, last, name]
+                    else:
+                        if first < entry[0]: entry[0] = first
+                        if last >= entry[1]:
+                            entry[1] = last
+                            if name: entry[2] = name
+    db.merge_history([(sid, name, first, last) for sid, (first, last, name) in merged.items()])
+
+    elapsed = max(time.perf_counter() - started, 1e-6)
+    summary = {'files': len(paths), 'bytes': total_bytes, 'players': len(merged),
+               'seconds': elapsed, 'mb_per_s': total_bytes / (1024 * 1024) / elapsed}
+    logger.event("ANALYTICS", f"Backfill: {summary['files']} files, {total_bytes / (1024 * 1024):.1f} MB, "
+                              f"{summary['players']} players in {elapsed:.1f}s ({summary['mb_per_s']:.1f} MB/s)")
+    return summary
+
+if __name__ == "__main__":
+    import analytics
+    files = []
+    for arg in sys.argv[1:]:
+        files.extend(find_log_files(arg) if os.path.isdir(arg) else [arg])
+    if not files:
+        print("Usage: python backfill.py <folder or .log file> [...]")
+        sys.exit(1)
+    result = backfill(files, analytics.open_player_database())
+    print(f"{result['files']} files | {result['bytes'] / (1024 * 1024):.1f} MB | {result['players']} players | "
+          f"{result['seconds']:.2f}s | {result['mb_per_s']:.1f} MB/s")
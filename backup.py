@@ -0,0 +1,723 @@
+# --- VERSION & IDENTITY ---
+# MANAGER_VERSION = "v4.4.5 (Stable Release)"
+
+# backup.py
+import os
+import json
+import queue
+import ctypes
+import struct
+import shutil
+import time
+import zlib
+import fnmatch
+import hashlib
+import zipfile
+import threading
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import psutil
+import constants
+import logger
+
+try:
+    import zstandard # Optional: enables the zstd codec
+except ImportError:
+    zstandard = None
+
+ZIP_METHODS = {'store': zipfile.ZIP_STORED, 'deflate': zipfile.ZIP_DEFLATED, 'zstd': 93} # 93 = Zstandard (APPNOTE 6.3.7)
+
+def is_excluded_dir(name):
+    return name.lower() in (d.lower() for d in constants.BACKUP_EXCLUDE_DIRS)
+
+def is_excluded_file(name):
+    return any(fnmatch.fnmatch(name.lower(), p) for p in constants.BACKUP_EXCLUDE_PATTERNS)
+
+def iter_save_files(saved_dir):
+    """Yields (abs_path, arcname) under saved_dir, skipping Logs/Crashes dirs (any depth) and *.log.
+    arcname uses '/' so archives look the same whether written on Windows or Linux."""
+    for root, dirs, files in os.walk(saved_dir):
+        dirs[:] = sorted(d for d in dirs if not is_excluded_dir(d))
+        rel_root = os.path.relpath(root, saved_dir)
+        for name in sorted(files):
+            if is_excluded_file(name): continue
+            rel = name if rel_root == '.' else os.path.join(rel_root, name)
+            yield os.path.join(root, name), rel.replace(os.sep, '/')
+
+def open_with_retry(path):
+    """The game may hold a save file open mid-write: retry the open a few times before giving up."""
+    for attempt in range(constants.BACKUP_LOCK_RETRIES + 1):
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            raise
+        except OSError:
+            if attempt == constants.BACKUP_LOCK_RETRIES: raise
+            time.sleep(constants.BACKUP_RETRY_DELAY)
+
+# --- PRIORITY & THROTTLING ---
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+
+def enter_background_mode():
+    """Drops the calling thread to low CPU and I/O priority: Windows thread background mode,
+    or the idle I/O class plus nice 19 on Linux. Returns False if the OS refused."""
+    try:
+        if os.name == 'nt':
+            kernel32 = ctypes.windll.kernel32
+            return bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN))
+        tid = threading.get_native_id()
+        psutil.Process(tid).ionice(psutil.IOPRIO_CLASS_IDLE) # Linux: I/O priority is per thread
+        os.setpriority(os.PRIO_PROCESS, tid, 19)
+        return True
+    except Exception as e:
+        logger.debug(f"Backup: could not lower thread priority: {e}")
+        return False
+
+class TokenBucket:
+    """Read-bandwidth cap: consume(n) sleeps once the bucket is in debt. Reads larger than the
+    burst are allowed and simply pay the debt back, so block size never has to match the cap."""
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+        self.waited = 0.0 # Total seconds slept, reported in the backup result
+        self._lock = threading.Lock()
+
+    def consume(self, n):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate) - n
+            self.stamp = now
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+        if wait: time.sleep(wait)
+
+def run_in_background(fn, *args):
+    """Runs fn(*args) on a fresh thread in background mode and returns its result. The caller's
+    own priority is untouched (Linux will not raise a thread's nice back without privileges)."""
+    out = {}
+    def _run():
+        enter_background_mode()
+        try: out['value'] = fn(*args)
+        except BaseException as e: out['error'] = e
+    worker = threading.Thread(target=_run, name="BackupLowPriority", daemon=True)
+    worker.start()
+    worker.join()
+    if 'error' in out: raise out['error']
+    return out.get('value')
+
+def available_codecs():
+    return ['store', 'deflate'] + (['zstd'] if zstandard else [])
+
+def _compress_block(codec, level, data, final):
+    """Compresses one block independently. Deflate blocks end on a sync flush (the last one on
+    Z_FINISH) so the per-block raw streams concatenate into one valid member, pigz-style.
+    zstd blocks are separate frames, which decoders read back to back."""
+    if codec == 'deflate':
+        c = zlib.compressobj(level, zlib.DEFLATED, -15)
+        return c.compress(data) + c.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return data
+
+def write_zip(saved_dir, zip_path, codec="deflate", level=None, workers=None, throttle=None):
+    """
+    Streams every file under saved_dir straight into zip_path (no temp copy). Files are
+    read in BACKUP_BLOCK_SIZE blocks on this thread and compressed on a worker pool; blocks
+    are written back in order, so memory stays at a few blocks per worker. The archive is
+    written as <zip_path>.partial and renamed when complete. Files still locked after the
+    retries (on open or mid-read), or deleted mid-backup, are skipped and listed in the
+    result; a member that fails mid-read is cut back off the archive. throttle: optional
+    TokenBucket capping source reads; the compression workers then also run in background mode.
+    """
+    if codec not in available_codecs():
+        logger.debug(f"Backup: codec '{codec}' unavailable, using deflate.")
+        codec, level = 'deflate', None # The other codec's level means nothing here
+    low, high = constants.BACKUP_LEVEL_RANGES[codec]
+    level = constants.BACKUP_LEVELS[codec] if level is None else min(max(int(level), low), high)
+    workers = workers or constants.BACKUP_WORKERS or os.cpu_count() or 1
+    method = ZIP_METHODS[codec]
+    start = time.perf_counter()
+    result = {'path': zip_path, 'files': 0, 'bytes': 0, 'skipped': [], 'codec': codec, 'level': level, 'workers': workers}
+
+    def read(src):
+        """One block; a read refused by a byte-range lock is retried from the same offset."""
+        pos = src.tell()
+        for attempt in range(constants.BACKUP_LOCK_RETRIES + 1):
+            try:
+                data = src.read(constants.BACKUP_BLOCK_SIZE)
+                break
+            except OSError:
+                if attempt == constants.BACKUP_LOCK_RETRIES: raise
+                time.sleep(constants.BACKUP_RETRY_DELAY)
+                src.seek(pos)
+        if throttle and data: throttle.consume(len(data))
+        return data
+
+    def blocks():
+        """(info, zip64, data, first, last) in archive order. CRC and size are accumulated as blocks are read.
+        data None means "discard this member" (read failed); first then says whether any block was yielded."""
+        for path, arcname in iter_save_files(saved_dir):
+            try:
+                src = open_with_retry(path)
+            except OSError as e:
+                result['skipped'].append(arcname)
+                logger.debug(f"Backup: skipped {arcname}: {e}")
+                continue
+            with src:
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                info.compress_type = method
+                zip64 = info.file_size * 1.05 > zipfile.ZIP64_LIMIT # Same rule as ZipFile.open()
+                info.CRC, info.file_size, info.compress_size = 0, 0, 0
+                first = True
+                try:
+                    data = read(src)
+                    while True:
+                        following = read(src) if data else b''
+                        info.CRC = zlib.crc32(data, info.CRC)
+                        info.file_size += len(data)
+                        yield info, zip64, data, first, not following
+                        first = False
+                        if not following: break
+                        data = following
+                except OSError as e:
+                    result['skipped'].append(arcname)
+                    logger.debug(f"Backup: skipped {arcname} (failed mid-read): {e}")
+                    yield info, zip64, None, first, True
+                    continue
+            result['files'] += 1
+            result['bytes'] += info.file_size
+
+    partial = zip_path + ".partial"
+    pool = ThreadPoolExecutor(workers, thread_name_prefix="BackupCompress", initializer=enter_background_mode if throttle else None)
+    try:
+        with zipfile.ZipFile(partial, 'w', allowZip64=True) as zf, pool:
+            fp = zf.fp
+            pending = deque()
+            def write_next():
+                info, zip64, first, last, future = pending.popleft()
+                if future is None:
+                    # Member failed mid-read: everything before it is written, so truncate its bytes away
+                    if not first:
+                        fp.seek(info.header_offset)
+                        fp.truncate()
+                    return
+                if first:
+                    # Placeholder header; rewritten with the final CRC/sizes once the member is complete
+                    info.header_offset = fp.tell()
+                    fp.write(info.FileHeader(zip64))
+                payload = future.result()
+                fp.write(payload)
+                info.compress_size += len(payload)
+                if last:
+                    end = fp.tell()
+                    fp.seek(info.header_offset)
+                    fp.write(info.FileHeader(zip64))
+                    fp.seek(end)
+                    zf.filelist.append(info)
+                    zf.NameToInfo[info.filename] = info
+                    zf.start_dir = end
+            for info, zip64, data, first, last in blocks():
+                pending.append((info, zip64, first, last, None if data is None else pool.submit(_compress_block, codec, level, data, last)))
+                if len(pending) >= workers * 2: write_next()
+            while pending: write_next()
+        os.replace(partial, zip_path)
+    except BaseException:
+        try: os.remove(partial)
+        except OSError: pass
+        raise
+    result['seconds'] = time.perf_counter() - start
+    result['bytes_per_s'] = result['bytes'] / max(result['seconds'], 1e-6)
+    result['archive_bytes'] = os.path.getsize(zip_path)
+    result['content_hash'] = hashlib.sha256("\n".join(f"{i.filename}:{i.CRC:08x}:{i.file_size}" for i in zf.filelist).encode()).hexdigest()
+    if throttle: result['throttled_s'] = throttle.waited
+    return result
+
+def format_result(result):
+    mb = result['bytes'] / (1024 * 1024)
+    text = f"{result['files']} files, {mb:,.1f} MB in {result['seconds']:.1f}s ({mb / max(result['seconds'], 1e-6):,.1f} MB/s)"
+    if 'new_bytes' in result:
+        text += f", {result['reused_files']} unchanged, {result['new_bytes'] / (1024 * 1024):,.1f} MB new data"
+    if result.get('throttled_s'): text += f", throttled {result['throttled_s']:.1f}s"
+    if result['skipped']: text += f", {len(result['skipped'])} locked file(s) skipped"
+    return text
+
+# --- INCREMENTAL STORE ---
+class BackupStore:
+    """
+    Content-addressed backup store under Backups/Store. Files are split into fixed-size
+    chunks, each kept once as objects/<sha[:2]>/<sha> (zlib). A backup is only a manifest
+    listing [path, size, mtime_ns, [chunk hashes]]; files whose size and mtime match the
+    previous manifest reuse its hashes without being read again.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objects')
+        self.manifests_dir = os.path.join(root, 'manifests')
+
+    def manifest_path(self, name):
+        return os.path.join(self.manifests_dir, name + ".json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _put(self, data):
+        """Stores one chunk. Returns (digest, bytes written; 0 if already present)."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path): return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        blob = zlib.compress(data, constants.BACKUP_STORE_LEVEL)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f: f.write(blob)
+        os.replace(tmp, path)
+        return digest, len(blob)
+
+    def read_object(self, digest):
+        with open(self._object_path(digest), 'rb') as f: return zlib.decompress(f.read())
+
+    def list_manifests(self):
+        """Manifest names, oldest first."""
+        if not os.path.isdir(self.manifests_dir): return []
+        names = [n[:-5] for n in os.listdir(self.manifests_dir) if n.endswith('.json')]
+        return sorted(names, key=lambda n: os.path.getmtime(self.manifest_path(n)))
+
+    def load_manifest(self, name):
+        with open(self.manifest_path(name), 'r', encoding='utf-8') as f: return json.load(f)
+
+    def create(self, saved_dir, name, previous_name=None, throttle=None):
+        """previous_name: manifest to diff against (the newest one when not given).
+        throttle: optional TokenBucket capping source reads."""
+        start = time.perf_counter()
+        result = {'path': self.manifest_path(name), 'files': 0, 'bytes': 0, 'skipped': [], 'new_bytes': 0, 'reused_files': 0}
+        previous = {}
+        if previous_name is None:
+            existing = self.list_manifests()
+            previous_name = existing[-1] if existing else None
+        if previous_name:
+            try: previous = {e[0]: e for e in self.load_manifest(previous_name)['files']}
+            except (OSError, ValueError, KeyError): pass
+        entries = []
+        for path, arcname in iter_save_files(saved_dir):
+            try:
+                st = os.stat(path)
+                old = previous.get(arcname)
+                if old and old[1] == st.st_size and old[2] == st.st_mtime_ns and all(os.path.exists(self._object_path(h)) for h in old[3]):
+                    entries.append(old)
+                    result['reused_files'] += 1
+                else:
+                    chunks = []
+                    with open_with_retry(path) as src:
+                        while True:
+                            data = src.read(constants.BACKUP_STORE_CHUNK_SIZE)
+                            if not data: break
+                            if throttle: throttle.consume(len(data))
+                            digest, written = self._put(data)
+                            chunks.append(digest)
+                            result['new_bytes'] += written
+                    entries.append([arcname, st.st_size, st.st_mtime_ns, chunks])
+            except OSError as e:
+                result['skipped'].append(arcname)
+                logger.debug(f"Backup: skipped {arcname}: {e}")
+                continue
+            result['files'] += 1
+            result['bytes'] += st.st_size
+        result['archive_bytes'] = result['new_bytes']
+        result['content_hash'] = hashlib.sha256("\n".join(f"{e[0]}:{','.join(e[3])}" for e in entries).encode()).hexdigest()
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        tmp = result['path'] + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'name': name, 'created': time.time(), 'files': entries}, f, separators=(',', ':'))
+        os.replace(tmp, result['path'])
+        result['seconds'] = time.perf_counter() - start
+        result['bytes_per_s'] = result['bytes'] / max(result['seconds'], 1e-6)
+        if throttle: result['throttled_s'] = throttle.waited
+        return result
+
+    def export_zip(self, name, zip_path):
+        """Rebuilds a regular zip (same layout as write_zip) from a manifest."""
+        manifest = self.load_manifest(name)
+        partial = zip_path + ".partial"
+        try:
+            with zipfile.ZipFile(partial, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+                for arcname, size, mtime_ns, chunks in manifest['files']:
+                    info = zipfile.ZipInfo(arcname, time.localtime(mtime_ns / 1e9)[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                    info.file_size = size
+                    with zf.open(info, 'w') as dst:
+                        for digest in chunks: dst.write(self.read_object(digest))
+            os.replace(partial, zip_path)
+        except BaseException:
+            try: os.remove(partial)
+            except OSError: pass
+            raise
+        return zip_path
+
+    def gc(self):
+        """Removes objects no manifest references. Returns bytes freed."""
+        live = set()
+        for name in self.list_manifests():
+            try:
+                for entry in self.load_manifest(name)['files']: live.update(entry[3])
+            except (OSError, ValueError, KeyError):
+                return 0 # Unreadable manifest: never risk deleting its data
+        freed = 0
+        if not os.path.isdir(self.objects_dir): return 0
+        for prefix in os.listdir(self.objects_dir):
+            folder = os.path.join(self.objects_dir, prefix)
+            for digest in os.listdir(folder):
+                if digest not in live:
+                    path = os.path.join(folder, digest)
+                    try:
+                        freed += os.path.getsize(path)
+                        os.remove(path)
+                    except OSError: pass
+        return freed
+
+# --- CATALOG ---
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+def open_catalog(backup_dir):
+    """One shared BackupCatalog per Backups folder (backup, verifier and UI threads all update it)."""
+    key = os.path.normcase(os.path.abspath(backup_dir))
+    with _catalogs_lock:
+        if key not in _catalogs: _catalogs[key] = BackupCatalog(backup_dir)
+        return _catalogs[key]
+
+class BackupCatalog:
+    """
+    Persistent index of backups (Backups/backup_catalog.json): name -> {name, file, kind,
+    created, size, bytes, files, hash, trigger, build}. Written when a backup is created or
+    deleted, so listing and retention never glob/stat the folder. reconcile() picks up
+    archives added or removed outside the manager with one directory listing.
+    """
+    def __init__(self, backup_dir):
+        self.backup_dir = backup_dir
+        self.path = os.path.join(backup_dir, constants.BACKUP_CATALOG_FILE)
+        self.entries = {}
+        self._lock = threading.RLock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f: self.entries = json.load(f).get('backups', {})
+        except (OSError, ValueError): pass
+
+    def save(self):
+        with self._lock:
+            data = json.dumps({'version': 1, 'backups': self.entries}, indent=1)
+            try:
+                os.makedirs(self.backup_dir, exist_ok=True)
+                tmp = self.path + ".tmp"
+                with open(tmp, 'w', encoding='utf-8') as f: f.write(data)
+                os.replace(tmp, self.path)
+            except OSError as e: logger.debug(f"Backup catalog save failed: {e}")
+
+    def add(self, name, kind, result, trigger, build=None):
+        entry = {'name': name, 'file': os.path.relpath(result['path'], self.backup_dir).replace(os.sep, '/'), 'kind': kind,
+                 'created': time.time(), 'size': result.get('archive_bytes', 0), 'bytes': result['bytes'],
+                 'files': result['files'], 'hash': result.get('content_hash'), 'trigger': trigger, 'build': build}
+        with self._lock:
+            self.entries[name] = entry
+            self.save()
+        return entry
+
+    def update(self, name, **fields):
+        with self._lock:
+            if name not in self.entries: return
+            self.entries[name].update(fields)
+            self.save()
+
+    def remove(self, name):
+        with self._lock:
+            if self.entries.pop(name, None) is not None: self.save()
+
+    def get(self, name):
+        with self._lock: return dict(self.entries[name]) if name in self.entries else None
+
+    def list(self, kind=None):
+        """Entries newest first."""
+        with self._lock:
+            rows = [dict(e) for e in self.entries.values() if kind is None or e['kind'] == kind]
+        return sorted(rows, key=lambda e: e['created'], reverse=True)
+
+    def file_path(self, entry):
+        return os.path.join(self.backup_dir, *entry['file'].split('/'))
+
+    def reconcile(self):
+        """Syncs with the folder: drops entries whose file is gone, adds unknown zips/manifests
+        (stat only, trigger EXTERNAL). Returns (added, removed)."""
+        found = {}
+        try:
+            with os.scandir(self.backup_dir) as it:
+                for e in it:
+                    if e.is_file() and e.name.lower().endswith('.zip'): found[e.name] = ('zip', e)
+        except OSError: pass
+        manifests = os.path.join(constants.BACKUP_STORE_DIR, 'manifests')
+        try:
+            with os.scandir(os.path.join(self.backup_dir, manifests)) as it:
+                for e in it:
+                    if e.name.endswith('.json'): found[f"{constants.BACKUP_STORE_DIR}/manifests/{e.name}"] = ('incremental', e)
+        except OSError: pass
+        added = removed = 0
+        with self._lock:
+            known = {e['file'] for e in self.entries.values()}
+            for name in [n for n, e in self.entries.items() if e['file'] not in found]:
+                del self.entries[name]
+                removed += 1
+            for rel, (kind, e) in found.items():
+                if rel in known: continue
+                st = e.stat()
+                name = os.path.splitext(e.name)[0]
+                if name in self.entries: name = rel
+                self.entries[name] = {'name': name, 'file': rel, 'kind': kind, 'created': st.st_mtime, 'size': st.st_size,
+                                      'bytes': None, 'files': None, 'hash': None, 'trigger': "EXTERNAL", 'build': None}
+                added += 1
+            if added or removed: self.save()
+        return added, removed
+
+# --- VERIFY & RESTORE ---
+def _safe_target(dest_dir, name):
+    """Join that refuses absolute paths and '..' (a crafted archive must not write outside dest_dir)."""
+    parts = [p for p in name.split('/') if p not in ('', '.')]
+    if not parts or '..' in parts or os.path.isabs(name) or ':' in parts[0]:
+        raise ValueError(f"Unsafe member path: {name}")
+    return os.path.join(dest_dir, *parts)
+
+class BackupReader:
+    """
+    Random-access reader over one catalogued backup. Zips are read through the central
+    directory (one seek per member); incremental backups through their manifest. Every
+    member is integrity-checked as it streams: zip CRC-32, or SHA-256 per stored chunk.
+    """
+    def __init__(self, catalog, entry):
+        self.entry = entry
+        self.path = catalog.file_path(entry)
+        self.kind = entry['kind']
+        if self.kind == "incremental":
+            self.store = BackupStore(os.path.dirname(os.path.dirname(self.path)))
+            with open(self.path, 'r', encoding='utf-8') as f: manifest = json.load(f)
+            self._files = {e[0]: e for e in manifest['files']}
+        else:
+            self.zf = zipfile.ZipFile(self.path)
+            self._files = {i.filename: i for i in self.zf.infolist() if not i.is_dir()}
+
+    def close(self):
+        if self.kind != "incremental": self.zf.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+    def members(self):
+        """[(name, size)] in archive order."""
+        if self.kind == "incremental": return [(n, e[1]) for n, e in self._files.items()]
+        return [(n, i.file_size) for n, i in self._files.items()]
+
+    def folders(self):
+        """Every folder prefix ('SaveGames/Server/') that contains at least one member."""
+        out = set()
+        for name in self._files:
+            parts = name.split('/')[:-1]
+            for k in range(1, len(parts) + 1): out.add('/'.join(parts[:k]) + '/')
+        return sorted(out)
+
+    def iter_member(self, name):
+        """Yields the member's bytes; raises on a CRC/hash mismatch."""
+        if self.kind == "incremental":
+            for digest in self._files[name][3]:
+                data = self.store.read_object(digest)
+                if hashlib.sha256(data).hexdigest() != digest: raise ValueError(f"{name}: chunk {digest[:12]} is corrupt")
+                yield data
+            return
+        info = self._files[name]
+        if info.compress_type == ZIP_METHODS['zstd']:
+            yield from self._iter_zstd(info)
+            return
+        with self.zf.open(info) as src: # zipfile checks the CRC when the member is fully read
+            while True:
+                data = src.read(constants.BACKUP_BLOCK_SIZE)
+                if not data: break
+                yield data
+
+    def _iter_zstd(self, info):
+        """zipfile cannot decode method 93: read the raw member and decompress its frames."""
+        if zstandard is None: raise RuntimeError(f"{info.filename}: zstd member needs the optional zstandard package (pip install zstandard)")
+        with open(self.path, 'rb') as f:
+            f.seek(info.header_offset)
+            header = f.read(30)
+            if header[:4] != b'PK\x03\x04': raise zipfile.BadZipFile(f"{info.filename}: bad local header")
+            name_len, extra_len = struct.unpack('<HH', header[26:30])
+            f.seek(name_len + extra_len, 1)
+            reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+            crc, left = 0, info.file_size
+            while left > 0:
+                data = reader.read(min(left, constants.BACKUP_BLOCK_SIZE))
+                if not data: raise zipfile.BadZipFile(f"{info.filename}: truncated")
+                crc = zlib.crc32(data, crc)
+                left -= len(data)
+                yield data
+            if crc != info.CRC: raise zipfile.BadZipFile(f"Bad CRC-32 for file {info.filename!r}")
+
+    def select(self, prefix):
+        """Member names equal to prefix, or under it when prefix is a folder ('a/b/')."""
+        if prefix in self._files: return [prefix]
+        folder = prefix.rstrip('/') + '/'
+        return [n for n in self._files if n.startswith(folder)]
+
+    def restore(self, prefix, dest_dir):
+        """Extracts one file or subfolder into dest_dir (relative layout kept), touching only the
+        members it needs. Returns {files, bytes, seconds}."""
+        start = time.perf_counter()
+        names = self.select(prefix)
+        if not names: raise KeyError(f"'{prefix}' is not in backup {self.entry['name']}")
+        total = 0
+        for name in names:
+            target = _safe_target(dest_dir, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as out:
+                for data in self.iter_member(name):
+                    out.write(data)
+                    total += len(data)
+        seconds = time.perf_counter() - start
+        return {'files': len(names), 'bytes': total, 'seconds': seconds}
+
+def verify_backup(catalog, entry):
+    """Reads every member back (CRC / chunk hash checked). Returns a catalog-ready summary."""
+    start = time.perf_counter()
+    total, errors = 0, []
+    try:
+        with BackupReader(catalog, entry) as reader:
+            for name, _ in reader.members():
+                try:
+                    for data in reader.iter_member(name): total += len(data)
+                except Exception as e:
+                    errors.append(f"{name}: {e}")
+    except Exception as e:
+        errors.append(str(e))
+    seconds = time.perf_counter() - start
+    return {'verify': "ok" if not errors else "corrupt", 'verified_at': time.time(), 'verify_seconds': round(seconds, 3),
+            'verify_mb_s': round(total / (1024 * 1024) / max(seconds, 1e-6), 1), 'verify_errors': errors[:10]}
+
+class BackupVerifier:
+    """Background thread (low CPU/I/O priority) that verifies backups queued by enqueue()."""
+    def __init__(self, on_done=None):
+        self.on_done = on_done
+        self._queue = queue.Queue()
+
+    def enqueue(self, backup_dir, name):
+        self._queue.put((backup_dir, name))
+
+    def run(self):
+        enter_background_mode()
+        while True:
+            backup_dir, name = self._queue.get()
+            catalog = open_catalog(backup_dir)
+            entry = catalog.get(name)
+            if not entry: continue
+            summary = verify_backup(catalog, entry)
+            catalog.update(name, **summary)
+            logger.event("BACKUP", f"Verified {name}: {summary['verify']}", **summary)
+            if self.on_done: self.on_done(name, summary)
+
+# --- FULL RESTORE ---
+def _unique_path(path):
+    candidate, n = path, 1
+    while os.path.exists(candidate):
+        n += 1
+        candidate = f"{path}-{n}"
+    return candidate
+
+def stage_restore(reader, saved_dir, workers=None):
+    """
+    Extracts the whole backup into <Saved>.restore-<stamp> beside saved_dir on a worker pool,
+    while the server keeps running. Every member is CRC/hash-checked as it is written and the
+    staged tree is compared with the member list. On any error the staging dir is removed
+    and the live Saved is untouched. Returns (staging_dir, {files, bytes, seconds}).
+    """
+    start = time.perf_counter()
+    staging = _unique_path(f"{saved_dir}.restore-{time.strftime('%Y%m%d-%H%M%S')}")
+    members = dict(reader.members())
+    workers = workers or constants.BACKUP_WORKERS or os.cpu_count() or 1
+    def extract(name):
+        target = _safe_target(staging, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        written = 0
+        with open(target, 'wb') as out:
+            for data in reader.iter_member(name):
+                out.write(data)
+                written += len(data)
+        return written
+    try:
+        os.makedirs(staging)
+        with ThreadPoolExecutor(workers, thread_name_prefix="RestoreExtract") as pool:
+            total = sum(pool.map(extract, members))
+        # Raw listing (not iter_save_files): a backup made elsewhere may legitimately contain Logs/ or *.log
+        staged = {}
+        for root, _, files in os.walk(staging):
+            for name in files:
+                path = os.path.join(root, name)
+                staged[os.path.relpath(path, staging).replace(os.sep, '/')] = os.path.getsize(path)
+        if staged != members:
+            raise ValueError(f"Staged tree does not match the backup ({len(staged)} of {len(members)} files)")
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return staging, {'files': len(members), 'bytes': total, 'seconds': time.perf_counter() - start}
+
+def swap_in(saved_dir, staging):
+    """Two renames: Saved -> Saved.pre-restore-<stamp> (safety snapshot), staging -> Saved.
+    Rolls the first rename back if the second fails. Returns (snapshot_dir, seconds)."""
+    start = time.perf_counter()
+    snapshot = _unique_path(f"{saved_dir}.pre-restore-{time.strftime('%Y%m%d-%H%M%S')}")
+    had_saved = os.path.exists(saved_dir)
+    if had_saved: os.rename(saved_dir, snapshot)
+    try:
+        os.rename(staging, saved_dir)
+    except BaseException:
+        if had_saved: os.rename(snapshot, saved_dir)
+        raise
+    seconds = time.perf_counter() - start
+    parent, base = os.path.split(saved_dir)
+    snapshots = sorted(n for n in os.listdir(parent) if n.startswith(base + ".pre-restore-"))
+    for old in snapshots[:-constants.RESTORE_SNAPSHOTS_KEEP]:
+        shutil.rmtree(os.path.join(parent, old), ignore_errors=True)
+    return (snapshot if had_saved else None), seconds
+
+# --- RETENTION ---
+GFS_TIERS = ['hourly', 'daily', 'weekly', 'monthly']
+_GFS_BUCKETS = {
+    'hourly': lambda d: (d.year, d.month, d.day, d.hour),
+    'daily': lambda d: (d.year, d.month, d.day),
+    'weekly': lambda d: d.isocalendar()[:2],
+    'monthly': lambda d: (d.year, d.month),
+}
+
+def gfs_retention(backups, hourly=0, daily=0, weekly=0, monthly=0, tz=None):
+    """
+    Grandfather-father-son selection. backups: iterable of (name, created_epoch).
+    Each tier keeps the newest backup of each of its N most recent periods (hour, day,
+    ISO week, month) that contain a backup. Returns {name: tier} where tier is the first
+    tier that kept it, or None when nothing keeps it (prune). Periods are in local time
+    unless tz (a tzinfo) is given. Pure: no I/O, no clock.
+    """
+    limits = {'hourly': hourly, 'daily': daily, 'weekly': weekly, 'monthly': monthly}
+    ordered = sorted(backups, key=lambda b: b[1], reverse=True)
+    decision = {name: None for name, _ in ordered}
+    for tier in GFS_TIERS:
+        limit, bucket_of, seen = int(limits[tier] or 0), _GFS_BUCKETS[tier], set()
+        for name, created in ordered:
+            if len(seen) >= limit: break
+            bucket = bucket_of(datetime.fromtimestamp(created, tz))
+            if bucket in seen: continue
+            seen.add(bucket)
+            if decision[name] is None: decision[name] = tier
+    return decision
+
+def retention_usage(entries, decision):
+    """{tier or 'prune': (count, bytes)} for the catalog entries under a gfs_retention() decision."""
+    usage = {}
+    for e in entries:
+        tier = decision.get(e['name']) or 'prune'
+        count, size = usage.get(tier, (0, 0))
+        usage[tier] = (count + 1, size + (e['size'] or 0))
+    return usage
@@ -0,0 +1,73 @@
+# --- VERSION & IDENTITY ---
+# MANAGER_VERSION = "v4.4.5 (Stable Release)"
+
+# benchmarks/bench_backup_compression.py
+# Usage: python benchmarks/bench_backup_compression.py [total_mb]
+import os
+import sys
+import time
+import random
+import shutil
+import zipfile
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import constants
+import backup
+
+def write_synthetic_saves(root, total_mb):
+    """Vein-like Saved tree: a few large world/region blobs, many small player files, config and logs.
+    Save data is a mix of repetitive structure and incompressible noise (~2-3x deflate ratio)."""
+    rnd = random.Random(7)
+    def blob(size):
+        out = bytearray()
+        while len(out) < size:
+            out += rnd.randbytes(4096) if rnd.random() < 0.3 else (b"VeinActor\x00" + rnd.randbytes(6)) * 256
+        return bytes(out[:size])
+    world = os.path.join(root, 'SaveGames', 'Server')
+    players = os.path.join(world, 'Players')
+    os.makedirs(players)
+    os.makedirs(os.path.join(root, 'Logs'))
+    os.makedirs(os.path.join(root, 'Config', 'WindowsServer'))
+    budget = total_mb * 1024 * 1024
+    for i in range(4):
+        with open(os.path.join(world, f'Region_{i}.sav'), 'wb') as f: f.write(blob(int(budget * 0.2)))
+    for i in range(400):
+        with open(os.path.join(players, f'7656119{i:010d}.sav'), 'wb') as f: f.write(blob(int(budget * 0.2 / 400)))
+    with open(os.path.join(root, 'Config', 'WindowsServer', 'Game.ini'), 'w') as f: f.write("[/Script/Vein.VeinGameSession]\n" * 50)
+    with open(os.path.join(root, 'Logs', 'Vein.log'), 'w') as f: f.write("excluded\n" * 1000)
+
+def report(label, source_bytes, seconds, archive):
+    size = os.path.getsize(archive)
+    with zipfile.ZipFile(archive) as zf:
+        if 'zstd' not in label: assert zf.testzip() is None, f"{label}: corrupt member"
+    print(f"{label:<28} {source_bytes / seconds / 1e6:>8.1f} MB/s  {seconds:>7.2f}s  ratio {source_bytes / size:>5.2f}x  ({size / 1e6:,.1f} MB)")
+
+def main():
+    total_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    tmp = tempfile.mkdtemp(prefix="vein_bench_")
+    try:
+        saved = os.path.join(tmp, 'Saved')
+        write_synthetic_saves(saved, total_mb)
+        source_bytes = sum(os.path.getsize(p) for p, _ in backup.iter_save_files(saved))
+        print(f"Synthetic tree: {source_bytes / 1e6:,.1f} MB, {os.cpu_count()} CPU(s)\n")
+
+        # Baseline: single-threaded make_archive (what create_backup used before)
+        start = time.perf_counter()
+        shutil.make_archive(os.path.join(tmp, 'baseline'), 'zip', saved)
+        report("make_archive deflate-6", source_bytes, time.perf_counter() - start, os.path.join(tmp, 'baseline.zip'))
+
+        cpus = os.cpu_count() or 1
+        settings = [('store', 0), ('deflate', 1), ('deflate', 6), ('deflate', 9)]
+        if 'zstd' in backup.available_codecs(): settings += [('zstd', 3), ('zstd', 10)]
+        for codec, level in settings:
+            for workers in sorted({1, cpus}):
+                out = os.path.join(tmp, f'{codec}_{level}_{workers}.zip')
+                r = backup.write_zip(saved, out, codec, level, workers)
+                report(f"{codec}-{level} x{workers} workers", source_bytes, r['seconds'], out)
+                os.remove(out)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
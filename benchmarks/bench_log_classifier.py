@@ -0,0 +1,75 @@
+# --- VERSION & IDENTITY ---
+# MANAGER_VERSION = "v4.4.5 (Stable Release)"
+
+# benchmarks/bench_log_classifier.py
+# Usage: python benchmarks/bench_log_classifier.py [line_count]
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import constants
+import logic
+
+NOISE = [
+    "[2024.05.01-12.00.00:000][  0]LogNet: Warning: Network Failure: GameNetDriver[ConnectionTimeout]",
+    "[2024.05.01-12.00.00:000][  0]LogTemp: Display: Spawner tick completed in 0.42ms",
+    "[2024.05.01-12.00.00:000][  0]LogAIModule: Zombie_C_1234 failed to find path",
+    "[2024.05.01-12.00.00:000][  0]LogStreaming: Display: Flushing async loaders.",
+    "[2024.05.01-12.00.00:000][  0]LogVeinPhysics: Warning: Actor BP_Door_C_77 penetrating world geometry",
+]
+SIGNAL = [
+    "[2024.05.01-12.00.00:000][  0]LogNet: AddClient: Player{n} SteamID: 7656119{n:010d}",
+    "[2024.05.01-12.00.00:000][  0]LogOnline: Verified steamid=7656119{n:010d}",
+    "[2024.05.01-12.00.00:000][  0]LogNet: RemoveClient: Player{n} ID 7656119{n:010d}",
+    "[2024.05.01-12.00.00:000][  0]" + constants.REGEX_SAVE_START,
+    "[2024.05.01-12.00.00:000][  0]" + constants.REGEX_SAVE_FINISH_B,
+]
+
+def legacy_classify(line):
+    """The pre-LogClassifier LogReader hot path (3 substring checks + 2 re.search)."""
+    a = constants.REGEX_SAVE_START in line
+    b = constants.REGEX_SAVE_FINISH_A in line or constants.REGEX_SAVE_FINISH_B in line
+    data = {}
+    steam_match = re.search(r'(?:SteamID|steamid|ID)[:\s=]+(7656\d{13})', line, re.IGNORECASE)
+    if steam_match: data['steamid'] = steam_match.group(1)
+    name_match = re.search(r'AddClient:\s+([^\s]+)', line)
+    if name_match: data['name'] = name_match.group(1)
+    return a, b, data
+
+def write_synthetic_log(path, line_count, signal_ratio=0.002):
+    rnd = random.Random(42)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(line_count):
+            if rnd.random() < signal_ratio: f.write(rnd.choice(SIGNAL).format(n=i) + "\n")
+            else: f.write(rnd.choice(NOISE) + "\n")
+
+def run(label, fn, lines):
+    start = time.perf_counter()
+    hits = 0
+    for line in lines:
+        if fn(line): hits += 1
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {len(lines) / elapsed:>14,.0f} lines/s   ({elapsed:.2f}s, {hits} non-empty results)")
+    return elapsed
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'Vein.log')
+        write_synthetic_log(path, count)
+        with open(path, 'r', encoding='utf-8') as f: lines = f.readlines()
+    print(f"Synthetic Vein.log: {count:,} lines")
+    def legacy(line):
+        save_start, save_finish, data = legacy_classify(line)
+        return save_start or save_finish or data
+    before = run("before (legacy)", legacy, lines)
+    classifier = logic.LogClassifier({'kick': r'LogNet: Kicked (\w+)'})
+    after = run("after (rules)", classifier.classify, lines)
+    print(f"Speedup: {before / after:.1f}x")
+
+if __name__ == "__main__":
+    main()
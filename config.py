@@ -21,6 +21,17 @@ def save_manager_config(config_obj):
     except Exception as e:
         print(f"Error saving config: {e}")
 
+def get_log_rules(config_obj):
+    """Returns {rule_name: regex} from the optional [LogRules] section."""
+    if not config_obj.has_section('LogRules'): return {}
+    return {k: v for k, v in config_obj.items('LogRules') if v.strip()}
+
+def get_readiness_settings(config_obj):
+    """Returns (log_markers, query_probe) from [Startup], defaulting to constants.LOG_READY_MARKERS."""
+    raw = config_obj.get('Startup', 'ReadyMarkers', fallback=None)
+    markers = constants.LOG_READY_MARKERS if raw is None else [m.strip() for m in raw.split(',') if m.strip()]
+    return markers, config_obj.getboolean('Startup', 'ReadyQueryProbe', fallback=True)
+
 def get_game_ini_path(server_path):
     if not server_path: return None
     return os.path.join(server_path, 'Vein', 'Saved', 'Config', 'WindowsServer', 'Game.ini')
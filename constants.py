@@ -5,7 +5,6 @@ AUTHOR_NAME = "Wolverinex77"
 # constants.py
 import os
 import sys
-from datetime import datetime
 
 APP_TITLE = f"Vein Manager {MANAGER_VERSION}"
 DEBUG_MODE = True  # <--- MASTER SWITCH
@@ -19,13 +18,52 @@ else:
 SERVER_EXECUTABLE = 'VeinServer-Win64-Test.exe'
 MANAGER_CONFIG_FILE = os.path.join(APPLICATION_PATH, 'manager_config.ini')
 HISTORY_FILE = os.path.join(APPLICATION_PATH, 'player_history.json')
+HISTORY_JOURNAL_FILE = os.path.join(APPLICATION_PATH, 'player_history.journal')  # Legacy (imported once)
+PLAYER_DB_FILE = os.path.join(APPLICATION_PATH, 'player_analytics.db')
+HISTORY_FLUSH_INTERVAL = 5       # Seconds between batched player DB writes
+TELEMETRY_FILE = os.path.join(APPLICATION_PATH, 'telemetry.bin')
+TELEMETRY_INTERVAL = 1           # Seconds between server resource samples
+TELEMETRY_SAVE_INTERVAL = 60     # Seconds between telemetry.bin writes
+RESTART_DELAY_MS = 3000          # Pause between kill and respawn on a restart
+RESTART_STATS_SAMPLES = 200      # Durations kept per restart phase for p50/p95/max
 
 # Log Organization
 LOGS_ROOT_DIR = os.path.join(APPLICATION_PATH, 'Manager_Logs')
 CRASH_LOGS_DIR = os.path.join(LOGS_ROOT_DIR, 'Crashes')
+CRASH_INDEX_FILE = os.path.join(CRASH_LOGS_DIR, 'crash_index.json')
+CRASH_INDEX_WRITE_INTERVAL = 30  # Seconds: repeats of a known crash only update the index this often
+CRASH_CONTEXT_SAMPLES = 5        # Recent tag/time samples kept per crash signature
+RESTART_STATS_FILE = os.path.join(LOGS_ROOT_DIR, 'restart_stats.json')
 HISTORY_LOGS_DIR = os.path.join(LOGS_ROOT_DIR, 'History')
-DAILY_LOG_FILE = os.path.join(HISTORY_LOGS_DIR, f"Events_{datetime.now().strftime('%Y-%m-%d')}.log")
+EVENTS_FILE_PATTERN = "Events_{date}.jsonl"    # One structured file per day (+ .idx.json sidecar)
 DEBUG_LOG_FILE = os.path.join(APPLICATION_PATH, "debug_crash.log")
+STEAMCMD_LOG_FILE = os.path.join(HISTORY_LOGS_DIR, "SteamCMD.log")
+
+# Background log writer (logger.debug / logger.event)
+LOG_WRITER_QUEUE_MAX = 20000       # Lines buffered before new ones are dropped (and counted)
+LOG_WRITER_FLUSH_INTERVAL = 0.25   # Seconds between batched writes
+
+# Backups (streamed straight from Vein/Saved into the archive)
+BACKUP_EXCLUDE_DIRS = ['Logs', 'Crashes']   # Skipped at any depth
+BACKUP_EXCLUDE_PATTERNS = ['*.log']
+BACKUP_LOCK_RETRIES = 5          # Re-open attempts for a save file locked by the game
+BACKUP_RETRY_DELAY = 0.5         # Seconds between attempts
+BACKUP_BLOCK_SIZE = 2 * 1024 * 1024  # Unit of parallel compression while streaming into the zip
+BACKUP_WORKERS = 0               # Compression threads (0 = one per CPU)
+BACKUP_LEVELS = {'store': 0, 'deflate': 6, 'zstd': 3}  # Default level per codec
+BACKUP_LEVEL_RANGES = {'store': (0, 0), 'deflate': (0, 9), 'zstd': (1, 22)}  # Valid levels per codec
+BACKUP_MODES = {"Full Zip": "zip", "Incremental": "incremental"}
+BACKUP_STORE_DIR = 'Store'       # Incremental store folder inside Backups/
+BACKUP_CATALOG_FILE = 'backup_catalog.json'  # Index of all backups inside Backups/
+GFS_DEFAULTS = {'hourly': 24, 'daily': 7, 'weekly': 4, 'monthly': 6}  # Tiered retention defaults
+RESTORE_SNAPSHOTS_KEEP = 3       # Saved.pre-restore-* safety snapshots kept next to Saved
+RESTORE_RELEASE_TIMEOUT = 15       # Seconds a full restore waits for the server PID and LogReader to let go of Saved
+BACKUP_THROTTLE_MBPS = 25         # Default read cap for throttled backups ([Backups] ThrottleMBps)
+BACKUP_IMPACT_BASELINE = 60        # Seconds of server telemetry before a backup used as the "before" figures
+REACTIVE_BACKUP_MIN_INTERVAL = 30  # Minutes between save-triggered backups (default for [Backups] ReactiveMinInterval)
+REACTIVE_BACKUP_DEBOUNCE = 10      # Seconds with no save running before a reactive backup starts
+BACKUP_STORE_CHUNK_SIZE = 4 * 1024 * 1024  # Dedup granularity for large save files
+BACKUP_STORE_LEVEL = 1           # zlib level for stored chunks (fast)
 
 # Profiles
 PROFILES_DIR = os.path.join(APPLICATION_PATH, 'User_Profiles')
@@ -49,6 +87,30 @@ LINK_KOFI = "https://ko-fi.com/wolverine74"
 REGEX_SAVE_START = "LogVeinSaveGame: Saving all objects"
 REGEX_SAVE_FINISH_A = "LogVeinSaveGame: Saved to slot Server"
 REGEX_SAVE_FINISH_B = "LogVeinSaveGame: Saved autosave game to disk"
+SENTINEL_TIMEOUT = 60            # Max seconds a shutdown waits for saves/disk
+SENTINEL_QUIET_MS = 2000         # Both signals must stay quiet this long
+SENTINEL_WRITE_THRESHOLD = 256 * 1024  # Server write bytes/s still counted as "idle" (log spam)
+
+# --- READINESS (STARTING -> ONLINE) ---
+# Overridable in manager_config.ini: [Startup] ReadyMarkers (comma separated), ReadyQueryProbe
+LOG_READY_MARKERS = ["Bringing up level for play took", "Match State Changed from WaitingToStart to InProgress"]
+READY_PROBE_INTERVAL = 1.0       # Seconds between query-port probes
+READY_PROBE_TIMEOUT = 0.5        # Seconds to wait for an A2S reply
+READY_TIMEOUT = 600              # Give up waiting and report ONLINE anyway
+A2S_INFO_REQUEST = b'\xFF\xFF\xFF\xFFTSource Engine Query\x00'
+
+# --- LOG CLASSIFIER (Rule Engine) ---
+# Literal markers are checked with plain substring tests before any regex runs.
+LOG_PLAYER_JOIN_MARKER = "AddClient:"
+LOG_PLAYER_LEAVE_MARKER = "RemoveClient:"
+LOG_STEAMID_MARKER = "7656"  # Every SteamID64 starts with this
+LOG_CRASH_MARKERS = ["Fatal error!", "Unhandled Exception:", "=== Critical error: ==="]
+
+# --- LIVE LOG VIEWER (UI Pipeline) ---
+LOG_QUEUE_MAX_LINES = 5000   # Reader -> UI buffer. Overflow is dropped (and counted).
+LOG_DRAIN_INTERVAL_MS = 66   # UI flush rate (~15 Hz)
+LOG_DRAIN_BATCH_MAX = 1000   # Max lines pulled from the queue per flush
+LOG_SCROLLBACK_LINES = 5000  # Default on-screen line cap (full history stays on disk)
 
 # --- THE TRUTH TABLE (Gameplay Defaults) ---
 GAMEPLAY_DEFINITIONS = {
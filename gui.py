@@ -4,13 +4,172 @@
 # gui.py
 import tkinter as tk
 from tkinter import ttk
+from tkinter import filedialog
+from tkinter import font as tkfont
 import constants
+import backup
 import webbrowser
 import os
 import glob
 
 def setup_styles(): pass
 
+def trim_text_widget(widget, max_lines):
+    """Ring-buffer behaviour for tk.Text: drops the oldest lines once the cap is exceeded.
+    Trims overshoot by 10% so the delete runs in bulk instead of once per insert."""
+    if max_lines <= 0: return
+    line_count = int(widget.index('end-1c').split('.')[0])
+    if line_count > max_lines + max(1, max_lines // 10):
+        widget.delete('1.0', f"{line_count - max_lines + 1}.0")
+
+class VirtualList(tk.Frame):
+    """
+    Listbox that only ever holds the visible window of rows.
+    count_fn(filter_text) -> int and fetch_fn(filter_text, offset, limit) -> [str] are queried
+    on demand, so refresh/scroll cost depends on the window height, not the dataset size.
+    The selection is tracked by key_fn(row) (default: the row text), not by position, so it
+    stays on the same item when rows are inserted or re-sorted by a refresh.
+    """
+    def __init__(self, parent, count_fn, fetch_fn, filter_label="Filter:", key_fn=None, **listbox_opts):
+        super().__init__(parent)
+        self.count_fn, self.fetch_fn = count_fn, fetch_fn
+        self.key_fn = key_fn or (lambda row: row)
+        self.filter_var = tk.StringVar()
+        self.total = 0
+        self.first = 0
+        self.selected = None # Row text as it was when clicked
+        self.rows_visible = int(listbox_opts.get('height', 10))
+        self._filter_job = None
+        if filter_label:
+            ff = tk.Frame(self); ff.pack(fill='x', pady=(0, 5))
+            tk.Label(ff, text=filter_label).pack(side='left')
+            tk.Entry(ff, textvariable=self.filter_var).pack(side='left', fill='x', expand=True, padx=5)
+            self.filter_var.trace_add('write', lambda *a: self._schedule_filter())
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scroll)
+        self.scrollbar.pack(side='right', fill='y')
+        self.listbox = tk.Listbox(self, exportselection=False, **listbox_opts)
+        self.listbox.pack(side='left', fill='both', expand=True)
+        self.listbox.bind("<Configure>", self._on_resize)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<MouseWheel>", lambda e: self._scroll_by(int(-3 * (e.delta / 120))))
+        self.listbox.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.listbox.bind("<Button-5>", lambda e: self._scroll_by(3))
+
+    def refresh(self):
+        """Re-counts (cheap) and re-renders the current window."""
+        self.total = self.count_fn(self.filter_var.get())
+        if not self.total: self.selected = None
+        self._render()
+
+    def get_selected(self):
+        """The clicked row (callers look the item up again by its key)."""
+        return self.selected
+
+    def _schedule_filter(self):
+        # Debounce keystrokes so typing fast does not queue one query per character
+        if self._filter_job: self.after_cancel(self._filter_job)
+        self._filter_job = self.after(150, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_job = None
+        self.first = 0
+        self.selected = None
+        self.refresh()
+
+    def _render(self):
+        self.first = max(0, min(self.first, self.total - self.rows_visible))
+        rows = self.fetch_fn(self.filter_var.get(), self.first, self.rows_visible) if self.total else []
+        self.listbox.delete(0, tk.END)
+        if rows: self.listbox.insert(tk.END, *rows)
+        if self.selected is not None:
+            key = self.key_fn(self.selected)
+            for i, row in enumerate(rows):
+                if self.key_fn(row) == key: self.listbox.selection_set(i); break
+        if self.total > self.rows_visible:
+            self.scrollbar.set(self.first / self.total, (self.first + len(rows)) / self.total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_scroll(self, action, amount, unit=None):
+        if action == "moveto": self.first = int(float(amount) * self.total)
+        elif action == "scroll": self.first += int(amount) * (self.rows_visible if unit == "pages" else 1)
+        self._render()
+
+    def _scroll_by(self, rows):
+        self.first += rows
+        self._render()
+        return "break" # Keep the page canvas from scrolling too
+
+    def _on_resize(self, event):
+        line = tkfont.Font(font=self.listbox['font']).metrics('linespace') + 1
+        rows = max(1, event.height // line)
+        if rows != self.rows_visible:
+            self.rows_visible = rows
+            self._render()
+
+    def _on_select(self, event):
+        sel = self.listbox.curselection()
+        if sel: self.selected = self.listbox.get(sel[0])
+
+class ListSource:
+    """In-memory VirtualList source. Filtering is cached per filter string."""
+    def __init__(self, rows=None):
+        self.set_rows(rows or [])
+
+    def set_rows(self, rows):
+        self.rows = rows
+        self._filter, self._view = "", rows
+
+    def _filtered(self, text):
+        text = text.strip().lower()
+        if text != self._filter:
+            self._filter = text
+            self._view = [r for r in self.rows if text in r.lower()] if text else self.rows
+        return self._view
+
+    def count(self, text):
+        return len(self._filtered(text))
+
+    def fetch(self, text, offset, limit):
+        return self._filtered(text)[offset:offset + limit]
+
+def draw_chart(canvas, points, title):
+    """Minimal line chart of [(t, v)] scaled to the canvas."""
+    canvas.delete("all")
+    w, h = int(canvas.winfo_width()), int(canvas.winfo_height())
+    if w < 10 or h < 10: return
+    if len(points) < 2:
+        canvas.create_text(w // 2, h // 2, text="No samples for this window yet.", fill="grey")
+        return
+    t0, t1 = points[0][0], points[-1][0]
+    vmax = max(v for _, v in points) or 1.0
+    pad = 20
+    coords = []
+    for t, v in points:
+        coords += [pad + (t - t0) / max(t1 - t0, 1e-6) * (w - 2 * pad), h - pad - v / vmax * (h - 2 * pad)]
+    canvas.create_line(*coords, fill="#3498db", width=2)
+    canvas.create_text(pad, 8, anchor="w", text=f"{title}  (max {vmax:,.1f}, last {points[-1][1]:,.1f})", font=("Segoe UI", 8))
+
+def create_restore_dialog(app, title, names, on_restore):
+    """Picker for a single-file / subfolder restore. on_restore(name, dest_dir) runs the extraction."""
+    win = tk.Toplevel(app.root)
+    win.title(title)
+    win.geometry("640x420")
+    source = ListSource(names)
+    picker = VirtualList(win, source.count, source.fetch, font=("Courier New", 10), height=16)
+    picker.pack(fill='both', expand=True, padx=10, pady=5)
+    picker.refresh()
+    tk.Label(win, text="Folders end with '/' and restore everything below them.", fg="grey").pack()
+    def _go():
+        name = picker.get_selected()
+        if not name: return
+        dest = filedialog.askdirectory(parent=win, title="Restore into...")
+        if dest:
+            on_restore(name, dest)
+            win.destroy()
+    tk.Button(win, text="Restore To...", command=_go).pack(pady=5)
+    return win
+
 def create_main_layout(app):
     top_bar = tk.Frame(app.root, padx=10, pady=5)
     top_bar.pack(fill="x", side="top")
@@ -45,6 +204,8 @@ def create_main_layout(app):
     app.pid_label.pack(side="left", padx=10)
     app.version_label = tk.Label(info_bar, text=f"Build: {app.current_build_id}", bg="#e0e0e0")
     app.version_label.pack(side="left", padx=10)
+    app.ram_label = tk.Label(info_bar, text="RAM: - | CPU: -", bg="#e0e0e0")
+    app.ram_label.pack(side="left", padx=10)
     app.crash_label = tk.Label(info_bar, text="Crashes: 0", bg="#e0e0e0")
     app.crash_label.pack(side="left", padx=10)
     tk.Button(info_bar, text="Reset", font=("Arial", 7), command=app.reset_crash_counter).pack(side="left")
@@ -171,15 +332,18 @@ def _build_gameplay_tab(app, parent):
 def _build_players_tab(app, parent):
     f_frame = tk.Frame(parent, pady=5); f_frame.pack(fill='x', padx=10)
     tk.Label(f_frame, text="View Mode:").pack(side='left')
-    app.player_filter_menu = ttk.Combobox(f_frame, textvariable=app.player_filter_var, values=["Online Now", "History (All Time)"], state="readonly")
+    app.player_filter_menu = ttk.Combobox(f_frame, textvariable=app.player_filter_var, values=["Online Now", "Seen Last 7 Days", "Top Playtime", "History (All Time)"], state="readonly")
     app.player_filter_menu.pack(side='left', padx=10)
     app.player_filter_menu.bind("<<ComboboxSelected>>", lambda e: app.refresh_player_list_ui())
+    app.player_count_label = tk.Label(f_frame, text="0 players", fg="grey")
+    app.player_count_label.pack(side='left', padx=5)
     tk.Button(f_frame, text="🚫 Ban Selected SteamID", bg="#ffebee", fg="red", command=app.ban_selected_player).pack(side='right', padx=10)
-    pl_cont = tk.LabelFrame(parent, text="Players (Name | SteamID | Last Seen)", padx=10, pady=10)
+    tk.Button(f_frame, text="Backfill Old Logs...", command=app.start_log_backfill).pack(side='right')
+    pl_cont = tk.LabelFrame(parent, text="Players (Name | SteamID | Last Seen | Playtime)", padx=10, pady=10)
     pl_cont.pack(fill='both', expand=True, padx=10, pady=10)
-    app.players_listbox = tk.Listbox(pl_cont, font=("Courier New", 10), height=15)
-    app.players_listbox.pack(fill='both', expand=True, side='left')
-    tk.Scrollbar(pl_cont, orient="vertical", command=app.players_listbox.yview).pack(side="right", fill="y")
+    app.players_list = VirtualList(pl_cont, app.count_player_rows, app.fetch_player_rows, filter_label="Filter (Name / SteamID):",
+                                  key_fn=lambda row: row.split(" | ")[1] if " | " in row else row, font=("Courier New", 10), height=15)
+    app.players_list.pack(fill='both', expand=True)
 
 def _build_scheduler_tab(app, parent):
     d_grp = tk.LabelFrame(parent, text="Fixed Time Schedule", padx=10, pady=10); d_grp.pack(fill='x', padx=10, pady=10)
@@ -202,6 +366,10 @@ def _build_logs_tab(app, parent):
     l_bar = tk.Frame(parent); l_bar.pack(fill='x', padx=5, pady=2)
     tk.Label(l_bar, text="Manager Events Log", font=("Segoe UI", 8, "bold"), fg="grey").pack(side='left')
     tk.Button(l_bar, text="Purge Logs", command=app.purge_manager_logs).pack(side='right')
+    app.log_stats_label = tk.Label(l_bar, text="Dropped: 0 | Coalesced: 0", font=("Segoe UI", 8), fg="grey")
+    app.log_stats_label.pack(side='right', padx=10)
+    tk.Spinbox(l_bar, from_=500, to=100000, increment=500, width=7, textvariable=app.log_scrollback_var).pack(side='right')
+    tk.Label(l_bar, text="Scrollback (lines):", font=("Segoe UI", 8), fg="grey").pack(side='right')
     app.log_text = tk.Text(parent, state='disabled', wrap='word', bg='black', fg='#00ff00', font=("Courier New", 9), height=20)
     app.log_text.pack(fill="both", expand=True, padx=5, pady=5)
 
@@ -213,6 +381,18 @@ def _build_mgmt_tab(app, parent):
     app.diag_status_label = tk.Label(doc_frame, text="Ready.", fg="grey")
     app.diag_status_label.pack(side='left', padx=10)
 
+    perf_frame = tk.LabelFrame(parent, text="Server Performance", padx=10, pady=5, fg="#2980b9")
+    perf_frame.pack(fill='x', padx=10, pady=5)
+    pr = tk.Frame(perf_frame); pr.pack(fill='x')
+    app.telemetry_metric_combobox = ttk.Combobox(pr, textvariable=app.telemetry_metric_var, state="readonly", width=18, values=list(app.telemetry_metric_choices))
+    app.telemetry_metric_combobox.pack(side='left')
+    app.telemetry_window_combobox = ttk.Combobox(pr, textvariable=app.telemetry_window_var, state="readonly", width=12, values=list(app.telemetry_window_choices))
+    app.telemetry_window_combobox.pack(side='left', padx=5)
+    for cb in (app.telemetry_metric_combobox, app.telemetry_window_combobox):
+        cb.bind("<<ComboboxSelected>>", lambda e: app.refresh_telemetry_chart())
+    app.telemetry_canvas = tk.Canvas(perf_frame, height=140, bg="white", highlightthickness=0)
+    app.telemetry_canvas.pack(fill='x', pady=5)
+
     vis_frame = tk.LabelFrame(parent, text="Visual Theme", padx=10, pady=5)
     vis_frame.pack(fill='x', padx=10, pady=5)
     tk.Label(vis_frame, text="Interface Accent Color:").pack(side='left')
@@ -225,6 +405,18 @@ def _build_mgmt_tab(app, parent):
     app.banned_list_text = tk.Text(ban_frame, height=4, width=60, font=("Courier New", 9))
     app.banned_list_text.pack(side='left', padx=5)
     tk.Button(ban_frame, text="Refresh List", command=app.refresh_ban_list).pack(side='left', padx=5, anchor='n')
+
+    crash_frame = tk.LabelFrame(parent, text="Manager Crash Signatures (Top 10)", padx=10, pady=5, fg="#c0392b")
+    crash_frame.pack(fill='x', padx=10, pady=5)
+    app.crash_summary_text = tk.Text(crash_frame, height=5, width=60, font=("Courier New", 9), state='disabled')
+    app.crash_summary_text.pack(side='left', fill='x', expand=True, padx=5)
+    tk.Button(crash_frame, text="Refresh", command=app.refresh_crash_summary).pack(side='left', padx=5, anchor='n')
+
+    rs_frame = tk.LabelFrame(parent, text="Restart Downtime by Phase", padx=10, pady=5, fg="#8e44ad")
+    rs_frame.pack(fill='x', padx=10, pady=5)
+    app.restart_stats_text = tk.Text(rs_frame, height=8, width=60, font=("Courier New", 9), state='disabled')
+    app.restart_stats_text.pack(side='left', fill='x', expand=True, padx=5)
+    tk.Button(rs_frame, text="Refresh", command=app.refresh_restart_stats).pack(side='left', padx=5, anchor='n')
     
     sc_frame = tk.LabelFrame(parent, text="SteamCMD Path", padx=10, pady=5)
     sc_frame.pack(fill='x', padx=10, pady=10)
@@ -267,15 +459,37 @@ def _build_backup_tab(app, parent):
     bs = tk.LabelFrame(parent, text="Backup Settings", padx=10, pady=5); bs.pack(fill='x', padx=10, pady=5)
     tk.Label(bs, text="Format:").pack(side='left'); app.backup_format_entry = tk.Entry(bs, width=30); app.backup_format_entry.pack(side='left', padx=5)
     tk.Label(bs, text="| Keep:").pack(side='left'); app.backup_retention_spinbox = tk.Spinbox(bs, from_=1, to=100, width=3); app.backup_retention_spinbox.pack(side='left')
+    tk.Label(bs, text="| Type:").pack(side='left', padx=(5, 0))
+    ttk.Combobox(bs, textvariable=app.backup_mode_var, values=list(constants.BACKUP_MODES), state="readonly", width=12).pack(side='left', padx=5)
+    tk.Label(bs, text="| Codec:").pack(side='left')
+    codec_box = ttk.Combobox(bs, textvariable=app.backup_codec_var, values=backup.available_codecs(), state="readonly", width=8); codec_box.pack(side='left', padx=5)
+    codec_box.bind("<<ComboboxSelected>>", lambda e: app.update_backup_level_range(reset=True))
+    tk.Label(bs, text="Level:").pack(side='left')
+    app.backup_level_spinbox = tk.Spinbox(bs, from_=0, to=9, width=3, textvariable=app.backup_level_var); app.backup_level_spinbox.pack(side='left')
+    tk.Checkbutton(bs, text="| Throttle", variable=app.backup_throttle_enabled).pack(side='left', padx=(5, 0))
+    tk.Spinbox(bs, from_=1, to=2000, width=4, textvariable=app.backup_throttle_var).pack(side='left')
+    tk.Label(bs, text="MB/s").pack(side='left')
+    rf = tk.LabelFrame(parent, text="Tiered Retention (Grandfather-Father-Son)", padx=10, pady=5); rf.pack(fill='x', padx=10, pady=5)
+    rr = tk.Frame(rf); rr.pack(fill='x')
+    tk.Checkbutton(rr, text="Enable (replaces Keep)", variable=app.gfs_enabled_var, command=app.refresh_backup_list).pack(side='left')
+    for tier in backup.GFS_TIERS:
+        tk.Label(rr, text=f"{tier.title()}:").pack(side='left', padx=(10, 0))
+        tk.Spinbox(rr, from_=0, to=999, width=4, textvariable=app.gfs_vars[tier]).pack(side='left')
+    app.retention_usage_label = tk.Label(rf, text="", fg="grey", anchor='w'); app.retention_usage_label.pack(fill='x')
     ba = tk.LabelFrame(parent, text="Automated", padx=10, pady=5); ba.pack(fill='x', padx=10, pady=5)
     tk.Checkbutton(ba, text="Enable Reactive Backups", variable=app.reactive_backup_enabled).pack(side='left')
+    tk.Label(ba, text="Min gap (min):").pack(side='left')
+    tk.Spinbox(ba, from_=1, to=1440, width=4, textvariable=app.reactive_interval_var).pack(side='left')
     tk.Checkbutton(ba, text="Backup on Stop", variable=app.backup_on_stop).pack(side='left', padx=10)
     blf = tk.Frame(parent); blf.pack(fill='both', expand=True, padx=10, pady=5)
-    app.backup_list = tk.Listbox(blf, bg='#f0f0f0', font=("Courier New", 10), height=10); app.backup_list.pack(side='left', fill='both', expand=True)
-    tk.Scrollbar(blf, orient="vertical", command=app.backup_list.yview).pack(side='right', fill='y')
+    app.backup_list = VirtualList(blf, app.backup_source.count, app.backup_source.fetch, key_fn=lambda row: row.split("  ")[0], bg='#f0f0f0', font=("Courier New", 10), height=10); app.backup_list.pack(fill='both', expand=True)
     bac = tk.Frame(parent); bac.pack(fill='x', padx=10)
-    tk.Button(bac, text="Create Backup", command=app.start_manual_backup).pack(side='left', pady=5, padx=5)
+    app.create_backup_button = tk.Button(bac, text="Create Backup", command=app.start_manual_backup); app.create_backup_button.pack(side='left', pady=5, padx=5)
     tk.Button(bac, text="Open Folder", command=app.open_backup_folder).pack(side='left', pady=5, padx=5)
+    tk.Button(bac, text="Export to Zip", command=app.export_selected_backup).pack(side='left', pady=5, padx=5)
+    tk.Button(bac, text="Verify", command=app.verify_selected_backup).pack(side='left', pady=5, padx=5)
+    tk.Button(bac, text="Restore Files...", command=app.restore_selected_files).pack(side='left', pady=5, padx=5)
+    tk.Button(bac, text="Restore Full Backup", fg="#c0392b", command=app.restore_full_backup).pack(side='left', pady=5, padx=5)
 
 def _build_about_tab(app, parent):
     c = tk.Frame(parent, padx=20, pady=20); c.pack(fill='both', expand=True)
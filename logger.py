@@ -3,13 +3,174 @@
 
 # logger.py
 import os
+import re
 import sys
+import json
+import hashlib
+import time
+import queue
+import atexit
 import traceback
 import threading
 import ctypes
-from datetime import datetime
+from datetime import datetime, timedelta
 import constants
 
+# --- BACKGROUND WRITER ---
+# debug()/event() never touch the disk themselves: lines go into a bounded queue and a
+# single writer thread appends them in batches (one open per file per batch).
+_write_queue = queue.Queue(maxsize=constants.LOG_WRITER_QUEUE_MAX)
+_write_lock = threading.Lock()
+_writer_started = False
+_indexes = {} # events path -> sidecar index (see _index_path)
+dropped_lines = 0
+
+def _enqueue(path, text, echo=False, index_key=None):
+    global dropped_lines
+    _ensure_writer()
+    try: _write_queue.put_nowait((path, text, echo, index_key))
+    except queue.Full: dropped_lines += 1 # Drop-newest: never block the caller
+
+def _ensure_writer():
+    global _writer_started
+    if _writer_started: return
+    with _write_lock:
+        if _writer_started: return
+        _writer_started = True
+        threading.Thread(target=_writer_loop, name="LogWriter", daemon=True).start()
+        atexit.register(flush)
+        atexit.register(flush_crash_index)
+
+def _writer_loop():
+    while True:
+        time.sleep(constants.LOG_WRITER_FLUSH_INTERVAL)
+        try: flush()
+        except Exception as e: print(f"LOG WRITER ERROR: {e}")
+
+def flush():
+    """Writes everything queued so far. Safe to call from any thread (crash/exit paths)."""
+    global dropped_lines
+    with _write_lock:
+        batch = {}
+        try:
+            while True:
+                path, text, echo, index_key = _write_queue.get_nowait()
+                batch.setdefault(path, []).append((text.encode('utf-8'), index_key))
+                if echo: print(text, end='')
+        except queue.Empty:
+            pass
+        if dropped_lines and constants.DEBUG_MODE:
+            batch.setdefault(constants.DEBUG_LOG_FILE, []).append((f"[LOGGER] {dropped_lines} lines dropped (queue full)\n".encode('utf-8'), None))
+            dropped_lines = 0
+        for path, lines in batch.items():
+            try:
+                indexed = lines[0][1] is not None
+                if indexed: _load_index(path) # Before appending, so a rebuild cannot count this batch twice
+                with open(path, "ab") as f:
+                    offset = f.tell()
+                    f.write(b"".join(data for data, _ in lines))
+                if indexed: _update_index(path, offset, lines)
+            except: pass
+
+# --- EVENT INDEX ---
+# Events_<date>.idx.json: {category: {hour: [count, first_byte, end_byte]}}.
+# A query only reads the byte ranges of the hours/categories it asks for.
+def _index_path(events_path):
+    return events_path[:-len(".jsonl")] + ".idx.json"
+
+def _load_index(events_path):
+    idx = _indexes.get(events_path)
+    if idx is not None: return idx
+    try:
+        with open(_index_path(events_path), 'r', encoding='utf-8') as f: idx = json.load(f)
+    except (OSError, ValueError):
+        idx = _rebuild_index(events_path)
+    _indexes[events_path] = idx
+    return idx
+
+def _rebuild_index(events_path):
+    """Sidecar missing or damaged: one scan of the day file restores it."""
+    idx = {}
+    try:
+        with open(events_path, 'rb') as f:
+            offset = 0
+            for raw in f:
+                try:
+                    rec = json.loads(raw)
+                    _index_add(idx, (rec['category'], rec['ts'][11:13]), offset, offset + len(raw))
+                except (ValueError, KeyError): pass
+                offset += len(raw)
+    except OSError: pass
+    return idx
+
+def _index_add(idx, key, start, end):
+    category, hour = key
+    slot = idx.setdefault(category, {}).setdefault(hour, [0, start, end])
+    slot[0] += 1
+    slot[1] = min(slot[1], start)
+    slot[2] = max(slot[2], end)
+
+def _update_index(events_path, offset, lines):
+    idx = _load_index(events_path)
+    for data, key in lines:
+        _index_add(idx, key, offset, offset + len(data))
+        offset += len(data)
+    tmp = _index_path(events_path) + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f: json.dump(idx, f)
+    os.replace(tmp, _index_path(events_path))
+
+def events_file(day=None):
+    """Path of the structured event file for `day` (a date/datetime, default today)."""
+    day = day or datetime.now()
+    return os.path.join(constants.HISTORY_LOGS_DIR, constants.EVENTS_FILE_PATTERN.format(date=day.strftime('%Y-%m-%d')))
+
+def query_events(category=None, since=None, until=None):
+    """
+    Returns event records (dicts) between `since` and `until` (datetimes; default: last 24h).
+    Days/hours without the category are skipped via the sidecar index, so e.g.
+    query_events("WATCHDOG", datetime.now() - timedelta(days=30)) never scans unrelated files.
+    """
+    flush()
+    until = until or datetime.now()
+    since = since or until - timedelta(days=1)
+    results = []
+    day = since.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day <= until:
+        path = events_file(day)
+        if os.path.exists(path):
+            with _write_lock: # The LogWriter mutates cached indexes in place
+                idx = {cat: dict(hours) for cat, hours in _load_index(path).items()}
+            categories = [category] if category else list(idx.keys())
+            ranges = []
+            for cat in categories:
+                for hour, (count, start, end) in idx.get(cat, {}).items():
+                    slot = day.replace(hour=int(hour))
+                    if slot + timedelta(hours=1) > since and slot <= until: ranges.append((start, end))
+            if ranges:
+                start, end = min(r[0] for r in ranges), max(r[1] for r in ranges)
+                with open(path, 'rb') as f:
+                    f.seek(start)
+                    chunk = f.read(end - start)
+                for raw in chunk.splitlines():
+                    try: rec = json.loads(raw)
+                    except ValueError: continue
+                    if category and rec.get('category') != category: continue
+                    ts = datetime.fromisoformat(rec['ts'])
+                    if since <= ts <= until: results.append(rec)
+        day += timedelta(days=1)
+    return results
+
+def purge_events():
+    """Deletes every structured event file and its index."""
+    flush()
+    if not os.path.isdir(constants.HISTORY_LOGS_DIR): return
+    with _write_lock:
+        _indexes.clear()
+        for name in os.listdir(constants.HISTORY_LOGS_DIR):
+            if name.startswith("Events_"):
+                try: os.remove(os.path.join(constants.HISTORY_LOGS_DIR, name))
+                except OSError: pass
+
 # --- INITIALIZATION ---
 def setup():
     """Hooks into the system to catch all errors."""
@@ -42,6 +203,8 @@ def handle_uncaught_exception(exc_type, exc_value, exc_traceback):
     err_msg = "".join(traceback.format_exception(exc_type, exc_value, exc_traceback))
     log_crash(err_msg, "MAIN_CRASH")
     debug(f"CRITICAL MAIN ERROR: {err_msg}")
+    flush()
+    flush_crash_index()
     
     # Attempt visual alert
     try: ctypes.windll.user32.MessageBoxW(0, f"Critical Error:\n{exc_value}", "Vein Manager Crashed", 0x10)
@@ -58,45 +221,102 @@ def handle_thread_exception(args):
     err_msg = "".join(traceback.format_exception(args.exc_type, args.exc_value, args.exc_traceback))
     log_crash(err_msg, f"THREAD_{args.thread.name}")
     debug(f"CRITICAL THREAD ERROR ({args.thread.name}): {err_msg}")
+    flush()
 
 # --- LOGGING FUNCTIONS ---
 def debug(msg):
     """Tier 3: The Brain Scan (Developer Info)."""
     if constants.DEBUG_MODE:
         timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted = f"[{timestamp}] [DEBUG] {msg}"
-        print(formatted) # Keep console output
-        try:
-            with open(constants.DEBUG_LOG_FILE, "a", encoding='utf-8') as f:
-                f.write(formatted + "\n")
-        except: pass
+        _enqueue(constants.DEBUG_LOG_FILE, f"[{timestamp}] [DEBUG] {msg}\n", echo=True) # Echo keeps console output
 
-def event(category, msg):
-    """Tier 2: The Audit Trail (User History)."""
+def event(category, msg, **payload):
+    """Tier 2: The Audit Trail (User History). One JSON line per event, rotated daily."""
     try:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        formatted = f"[{timestamp}] [{category}] {msg}\n"
-        with open(constants.DAILY_LOG_FILE, "a", encoding='utf-8') as f:
-            f.write(formatted)
+        now = datetime.now()
+        record = {'ts': now.isoformat(timespec='seconds'), 'category': category, 'pid': os.getpid(), 'msg': msg}
+        if payload: record['payload'] = payload
+        _enqueue(events_file(now), json.dumps(record, ensure_ascii=False) + "\n", index_key=(category, now.strftime('%H')))
         debug(f"EVENT: {category} - {msg}")
     except: pass
 
+# --- CRASH SIGNATURES ---
+# Each distinct (normalized) stack gets one Crash_<fingerprint>.txt and an entry in
+# crash_index.json with a counter, first/last seen and a few recent contexts.
+_crash_lock = threading.Lock()
+_crash_index = None
+_crash_index_written = 0.0
+
+def crash_fingerprint(trace):
+    """Stable id for a traceback: exception type + frames, minus paths, line numbers and addresses."""
+    frames = re.findall(r'File "([^"]+)", line \d+, in (\S+)', trace)
+    lines = [l for l in trace.strip().splitlines() if l.strip()]
+    exc_type = lines[-1].split(':', 1)[0].strip() if lines else "Unknown"
+    sig = exc_type + "|" + "|".join(f"{os.path.basename(f)}:{fn}" for f, fn in frames)
+    if not frames: sig += "|" + re.sub(r'0x[0-9a-fA-F]+|\d+', '#', lines[-1] if lines else "")
+    return hashlib.sha1(sig.encode('utf-8')).hexdigest()[:12], exc_type
+
+def _load_crash_index():
+    global _crash_index
+    if _crash_index is None:
+        try:
+            with open(constants.CRASH_INDEX_FILE, 'r', encoding='utf-8') as f: _crash_index = json.load(f)
+        except (OSError, ValueError):
+            _crash_index = {}
+    return _crash_index
+
+def _write_crash_index():
+    global _crash_index_written
+    if _crash_index is None: return
+    tmp = constants.CRASH_INDEX_FILE + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f: json.dump(_crash_index, f, indent=2)
+    os.replace(tmp, constants.CRASH_INDEX_FILE)
+    _crash_index_written = time.time()
+
+def flush_crash_index():
+    with _crash_lock:
+        try: _write_crash_index()
+        except Exception as e: print(f"CRITICAL: Failed to write crash index: {e}")
+
 def log_crash(trace, tag="UNKNOWN"):
-    """Tier 1: The Black Box (Crash Dump)."""
+    """Tier 1: The Black Box (Crash Dump). Deduplicated by stack fingerprint."""
     try:
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        filename = f"Crash_{timestamp}_{tag}.txt"
-        filepath = os.path.join(constants.CRASH_LOGS_DIR, filename)
-        with open(filepath, "w", encoding='utf-8') as f:
-            f.write(f"--- VEIN MANAGER CRASH REPORT ---\n")
-            f.write(f"Version: {constants.MANAGER_VERSION}\n")
-            f.write(f"Time: {datetime.now()}\n")
-            f.write(f"Tag: {tag}\n")
-            f.write("-" * 30 + "\n")
-            f.write(trace + "\n")
+        fp, exc_type = crash_fingerprint(trace)
+        now = datetime.now()
+        with _crash_lock:
+            index = _load_crash_index()
+            entry = index.get(fp)
+            is_new = entry is None
+            if is_new:
+                entry = index[fp] = {'exception': exc_type, 'tag': tag, 'count': 0, 'first_seen': now.isoformat(timespec='seconds'),
+                                     'file': f"Crash_{fp}.txt", 'contexts': []}
+            entry['count'] += 1
+            entry['last_seen'] = now.isoformat(timespec='seconds')
+            entry['contexts'] = (entry['contexts'] + [{'time': entry['last_seen'], 'tag': tag}])[-constants.CRASH_CONTEXT_SAMPLES:]
+
+            if is_new:
+                # First occurrence: full report, written synchronously
+                os.makedirs(constants.CRASH_LOGS_DIR, exist_ok=True)
+                with open(os.path.join(constants.CRASH_LOGS_DIR, entry['file']), "w", encoding='utf-8') as f:
+                    f.write(f"--- VEIN MANAGER CRASH REPORT ---\n")
+                    f.write(f"Version: {constants.MANAGER_VERSION}\n")
+                    f.write(f"Time: {now}\n")
+                    f.write(f"Tag: {tag}\n")
+                    f.write(f"Fingerprint: {fp}\n")
+                    f.write("-" * 30 + "\n")
+                    f.write(trace + "\n")
+            # Repeats are rate limited: the index is rewritten at most every CRASH_INDEX_WRITE_INTERVAL
+            if is_new or time.time() - _crash_index_written >= constants.CRASH_INDEX_WRITE_INTERVAL:
+                _write_crash_index()
     except Exception as e:
         print(f"CRITICAL: Failed to write crash log: {e}")
 
+def get_crash_summary(limit=10):
+    """Top crash signatures: [(fingerprint, entry_dict)] by occurrence count."""
+    with _crash_lock:
+        index = dict(_load_crash_index())
+    return sorted(index.items(), key=lambda kv: kv[1].get('count', 0), reverse=True)[:limit]
+
 # --- THREAD WRAPPERS ---
 def start_safe_thread(target, name="UnknownThread", args=(), daemon=True):
     """Starts a thread that is monitored by the logger."""
@@ -115,6 +335,7 @@ def start_safe_thread(target, name="UnknownThread", args=(), daemon=True):
             err_msg = "".join(traceback.format_exception(exc_type, exc_value, exc_traceback))
             log_crash(err_msg, f"THREAD_{name}")
             debug(f"Thread '{name}' DIED: {exc_value}")
+            flush()
     
     t = threading.Thread(target=_wrapper, name=name, args=args, daemon=daemon)
     t.start()
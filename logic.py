@@ -5,20 +5,20 @@
 import os
 import subprocess
 import shutil
-import tempfile
 import json
 import urllib.request
 import threading
-import glob
 import psutil
 import time
 import zipfile
 import re
 import socket
+from collections import namedtuple
 from datetime import datetime
 import constants
 import config
 import logger 
+import backup
 
 # --- PROFILES ---
 def get_profile_list():
@@ -95,18 +95,43 @@ def check_firewall_rule():
         return True
     except: return False
 
-def check_disk_activity(pid):
-    """Returns True if the process is writing to disk."""
-    try:
-        if not psutil.pid_exists(pid): return False
-        p = psutil.Process(pid)
-        io = p.io_counters()
-        initial = io.write_bytes
-        time.sleep(0.1)
-        final = p.io_counters().write_bytes
-        return (final - initial) > 0
-    except:
-        return False
+class SaveSentinel:
+    """
+    Save start/finish signalled by the LogReader. Shutdown blocks on the condition
+    instead of polling a flag, and wakes the moment a save finishes.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.saving = False
+        self.last_change = 0.0 # time.monotonic() of the last start/finish
+
+    def mark(self, saving):
+        with self._cond:
+            self.saving = saving
+            self.last_change = time.monotonic()
+            self._cond.notify_all()
+
+    def reset(self):
+        """Server gone: no save can be in progress."""
+        with self._cond:
+            self.saving = False
+            self.last_change = 0.0
+            self._cond.notify_all()
+
+    def is_quiet(self, quiet_s):
+        with self._cond:
+            return not self.saving and time.monotonic() - self.last_change >= quiet_s
+
+    def wait_quiet(self, quiet_s, deadline):
+        """Blocks until no save has been running for quiet_s. False if the monotonic deadline passes first."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                idle = now - self.last_change
+                if not self.saving and idle >= quiet_s: return True
+                if now >= deadline: return False
+                wait = deadline - now if self.saving else quiet_s - idle
+                self._cond.wait(min(wait, deadline - now))
 
 # --- DISCORD ---
 def send_discord_webhook(url, msg_type, description, is_test_env=False):
@@ -132,31 +157,81 @@ def send_discord_webhook(url, msg_type, description, is_test_env=False):
     threading.Thread(target=_send, daemon=True).start()
 
 # --- BACKUPS ---
-def create_backup(server_path, format_str, retention_count):
-    if not server_path: return False
+def get_backup_store(server_path):
+    return backup.BackupStore(os.path.join(server_path, 'Backups', constants.BACKUP_STORE_DIR))
+
+def get_server_build_id(server_path):
+    """Steam build id from steamapps/appmanifest_<appid>.acf (None if not installed via SteamCMD)."""
+    try:
+        with open(os.path.join(server_path, 'steamapps', f'appmanifest_{constants.VEIN_APP_ID}.acf'), 'r', encoding='utf-8', errors='ignore') as f:
+            m = re.search(r'"buildid"\s+"(\d+)"', f.read())
+            return m.group(1) if m else None
+    except OSError:
+        return None
+
+def delete_backup(server_path, entry):
+    """Removes a catalogued backup. Incremental chunks are freed by the next gc()."""
+    catalog = backup.open_catalog(os.path.join(server_path, 'Backups'))
+    try: os.remove(catalog.file_path(entry))
+    except FileNotFoundError: pass
+    catalog.remove(entry['name'])
+
+def prune_backups(server_path, keep, kind):
+    """
+    Retention over the catalog for one backup kind. keep is a count (newest N survive) or a
+    GFS policy dict {'hourly', 'daily', 'weekly', 'monthly'}. Returns bytes freed.
+    """
+    catalog = backup.open_catalog(os.path.join(server_path, 'Backups'))
+    freed = 0
+    entries = catalog.list(kind)
+    if isinstance(keep, dict):
+        if not any(keep.values()): return 0 # All tiers 0: retention disabled, like Keep 0
+        decision = backup.gfs_retention([(e['name'], e['created']) for e in entries], **keep)
+        old = [e for e in entries if decision[e['name']] is None]
+    else:
+        old = entries[keep:]
+    for entry in old:
+        if kind == "zip": freed += entry['size'] or 0
+        delete_backup(server_path, entry)
+    if old and kind == "incremental": freed += get_backup_store(server_path).gc()
+    return freed
+
+def create_backup(server_path, format_str, retention, mode="zip", codec="deflate", level=None, trigger="USER", throttle_mbps=0):
+    """
+    Backs up Vein/Saved into Backups/: a full zip (parallel, codec/level selectable), or
+    (mode "incremental") a manifest in the deduplicating store. The backup is recorded in
+    the catalog with its trigger and the server build. retention: keep-count or GFS policy
+    dict (see prune_backups). throttle_mbps > 0 caps source reads at that many MB/s and runs the
+    backup at background CPU/I/O priority. Returns the backup result dict (None on failure).
+    """
+    if not server_path: return None
     saved_dir = os.path.join(server_path, 'Vein', 'Saved')
     backup_dir = os.path.join(server_path, 'Backups')
     os.makedirs(backup_dir, exist_ok=True)
     try:
         if not format_str: format_str = "Server_Backup_%Y-%m-%d_%H-%M-%S"
         time_str = datetime.now().strftime(format_str)
-        temp_dir = tempfile.mkdtemp()
-        temp_save_path = os.path.join(temp_dir, 'Saved')
-        cmd = ['robocopy', saved_dir, temp_save_path, '/E', '/ZB', '/COPY:DAT', '/R:1', '/W:1', '/XD', 'Logs', 'Crashes', 'Saved/Logs', '*.log']
-        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=subprocess.CREATE_NO_WINDOW)
-        shutil.make_archive(os.path.join(backup_dir, time_str), 'zip', temp_save_path)
-        shutil.rmtree(temp_dir)
+        catalog = backup.open_catalog(backup_dir)
+        throttle = backup.TokenBucket(float(throttle_mbps) * 1024 * 1024, constants.BACKUP_BLOCK_SIZE) if throttle_mbps else None
+        if mode == "incremental":
+            latest = catalog.list("incremental")
+            work = lambda: get_backup_store(server_path).create(saved_dir, time_str, latest[0]['name'] if latest else None, throttle)
+        else:
+            work = lambda: backup.write_zip(saved_dir, os.path.join(backup_dir, time_str + ".zip"), codec, level, throttle=throttle)
+        result = backup.run_in_background(work) if throttle else work()
+        catalog.add(time_str, mode, result, trigger, get_server_build_id(server_path))
+        result['name'] = time_str
         try:
-            limit = int(retention_count)
-            if limit > 0:
-                backups = sorted(glob.glob(os.path.join(backup_dir, "*.zip")), key=os.path.getmtime)
-                while len(backups) > limit: os.remove(backups.pop(0))
-        except: pass
-        logger.event("BACKUP", f"Created backup: {time_str}")
-        return True
+            keep = retention if isinstance(retention, dict) else int(retention)
+            if keep: result['freed_bytes'] = prune_backups(server_path, keep, mode)
+        except Exception as e: logger.debug(f"Backup retention failed: {e}")
+        logger.event("BACKUP", f"Created backup: {time_str} ({backup.format_result(result)})", mode=mode, trigger=trigger, files=result['files'],
+                     bytes=result['bytes'], new_bytes=result.get('new_bytes'), seconds=round(result['seconds'], 3), skipped=result['skipped'],
+                     throttle_mbps=throttle_mbps or None, throttled_s=round(result.get('throttled_s', 0), 3))
+        return result
     except Exception as e: 
         logger.debug(f"Backup Failed: {e}")
-        return False
+        return None
 
 def run_steamcmd(steam_exe, server_path, branch, output_callback=None, validate_files=False):
     if not steam_exe or not server_path: return False
@@ -165,8 +240,13 @@ def run_steamcmd(steam_exe, server_path, branch, output_callback=None, validate_
     cmd = [steam_exe, '+force_install_dir', server_path] + args
     try:
         process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, creationflags=subprocess.CREATE_NO_WINDOW)
-        for line in iter(process.stdout.readline, ''):
-            if output_callback: output_callback(line)
+        # Full transcript goes to disk; the on-screen console is capped by the scrollback limit
+        os.makedirs(os.path.dirname(constants.STEAMCMD_LOG_FILE), exist_ok=True)
+        with open(constants.STEAMCMD_LOG_FILE, 'a', encoding='utf-8') as transcript:
+            transcript.write(f"--- SteamCMD {' '.join(args)} @ {datetime.now()} ---\n")
+            for line in iter(process.stdout.readline, ''):
+                transcript.write(line)
+                if output_callback: output_callback(line)
         process.wait()
         return process.returncode == 0
     except Exception as e:
@@ -174,14 +254,122 @@ def run_steamcmd(steam_exe, server_path, branch, output_callback=None, validate_
         return False
 
 # --- ANALYTICS & PROCESS MANAGEMENT ---
+LogEvent = namedtuple('LogEvent', ['kind', 'steamid', 'name', 'rule', 'text'])
+
+def _required_literal(pattern):
+    """
+    The longest literal run every match of `pattern` must contain, or '' (no prefilter).
+    Groups, alternation and counted repeats make that hard to prove, so those get ''.
+    """
+    p = re.sub(r'\[(?:\\.|[^\]])*\]|\\.', '\0', pattern)          # char classes / escapes
+    if re.search(r'[(|{]', p): return ''
+    p = re.sub(r'.(?=[?*])', '\0', p)                                 # optional chars
+    chunks = re.split(r'[\0.^$*+?\]]', p)
+    return max(chunks, key=len) if chunks else ''
+
+class LogClassifier:
+    """
+    Single-pass Vein.log classifier. All patterns are compiled once; each rule has a literal
+    needle checked with a plain substring test first, so most lines never touch a regex.
+    classify() returns one LogEvent (first matching rule wins) or None.
+    """
+    def __init__(self, user_rules=None, ready_markers=None):
+        self._ready_markers = [m for m in (ready_markers or []) if m]
+        self._steam_re = re.compile(r'[Ii][Dd][:\s=]+(7656\d{13})')
+        self._join_re = re.compile(re.escape(constants.LOG_PLAYER_JOIN_MARKER) + r'\s+([^\s]+)')
+        self._leave_re = re.compile(re.escape(constants.LOG_PLAYER_LEAVE_MARKER) + r'\s+([^\s]+)')
+        self._user_rules = []
+        for name, pattern in (user_rules or {}).items():
+            try: self._user_rules.append((name, _required_literal(pattern), re.compile(pattern)))
+            except re.error as e: logger.debug(f"LogRules: Ignoring invalid rule '{name}': {e}")
+
+    def classify(self, line):
+        if constants.REGEX_SAVE_START in line:
+            return LogEvent("SAVE_START", None, None, None, line)
+        if constants.REGEX_SAVE_FINISH_A in line or constants.REGEX_SAVE_FINISH_B in line:
+            return LogEvent("SAVE_FINISH", None, None, None, line)
+        for marker in self._ready_markers:
+            if marker in line:
+                return LogEvent("READY", None, None, marker, line)
+        for marker in constants.LOG_CRASH_MARKERS:
+            if marker in line:
+                return LogEvent("CRASH", None, None, marker, line)
+
+        if constants.LOG_STEAMID_MARKER in line:
+            m = self._steam_re.search(line)
+            if m:
+                sid = m.group(1)
+                if constants.LOG_PLAYER_LEAVE_MARKER in line:
+                    n = self._leave_re.search(line)
+                    return LogEvent("PLAYER_LEAVE", sid, n.group(1) if n else None, None, line)
+                if constants.LOG_PLAYER_JOIN_MARKER in line:
+                    n = self._join_re.search(line)
+                    return LogEvent("PLAYER_JOIN", sid, n.group(1) if n else None, None, line)
+                return LogEvent("PLAYER_SEEN", sid, None, None, line)
+        if constants.LOG_PLAYER_LEAVE_MARKER in line:
+            n = self._leave_re.search(line)
+            if n: return LogEvent("PLAYER_LEAVE", None, n.group(1), None, line)
+        if constants.LOG_PLAYER_JOIN_MARKER in line:
+            n = self._join_re.search(line)
+            if n: return LogEvent("PLAYER_JOIN", None, n.group(1), None, line)
+
+        for name, literal, regex in self._user_rules:
+            if literal in line and regex.search(line):
+                return LogEvent("RULE", None, None, name, line)
+        return None
+
+_default_classifier = None
+
 def parse_log_line_for_analytics(line):
+    """Legacy dict interface ({'steamid', 'name'}) on top of LogClassifier."""
+    global _default_classifier
+    if _default_classifier is None: _default_classifier = LogClassifier()
     data = {}
-    steam_match = re.search(r'(?:SteamID|steamid|ID)[:\s=]+(7656\d{13})', line, re.IGNORECASE)
-    if steam_match: data['steamid'] = steam_match.group(1)
-    name_match = re.search(r'AddClient:\s+([^\s]+)', line)
-    if name_match: data['name'] = name_match.group(1)
+    ev = _default_classifier.classify(line)
+    if ev:
+        if ev.steamid: data['steamid'] = ev.steamid
+        if ev.name: data['name'] = ev.name
     return data
 
+# --- PLAYER HISTORY (Legacy Snapshot + Journal) ---
+class PlayerHistoryJournal:
+    """
+    Reader for the pre-SQLite history format: player_history.json snapshot plus the
+    player_history.journal sighting log (one JSON object per line). Only used to import
+    old installs into analytics.PlayerDatabase.
+    """
+    def __init__(self, snapshot_path=None, journal_path=None):
+        self.snapshot_path = snapshot_path or constants.HISTORY_FILE
+        self.journal_path = journal_path or constants.HISTORY_JOURNAL_FILE
+        self.history = {}
+
+    def load(self):
+        """Replays snapshot + any journals (including one left by an interrupted compaction)."""
+        history = {}
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r') as f: history = json.load(f)
+            except: history = {}
+        for path in (self.journal_path + '.compacting', self.journal_path):
+            if not os.path.exists(path): continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try: e = json.loads(line)
+                    except ValueError: continue # Torn write at the tail
+                    self._apply(history, e['sid'], e.get('name'), e['ts'])
+        self.history = history
+        return history
+
+    @staticmethod
+    def _apply(history, sid, name, ts):
+        entry = history.get(sid)
+        if entry is None:
+            history[sid] = entry = {'name': name or 'Unknown', 'first_seen': ts, 'last_seen': ts}
+        if ts < entry.get('first_seen', ts): entry['first_seen'] = ts
+        if ts >= entry.get('last_seen', ''):
+            entry['last_seen'] = ts
+            if name: entry['name'] = name
+
 def ban_player_steamid(server_path, steamid):
     if not server_path or not steamid: return False
     game_ini_path = os.path.join(server_path, 'Vein', 'Saved', 'Config', 'WindowsServer', 'Game.ini')
@@ -225,6 +413,25 @@ def get_banned_players(server_path):
         except: pass
     return bans
 
+def log_rotated(f, path):
+    """True when `path` now names a different (or truncated) file than the open handle `f`."""
+    try:
+        st, cur = os.stat(path), os.fstat(f.fileno())
+        return bool(st.st_ino and st.st_ino != cur.st_ino) or st.st_size < f.tell()
+    except (OSError, ValueError):
+        return False
+
+def probe_query_port(port, host='127.0.0.1', timeout=None):
+    """Sends an A2S_INFO query; any Steam query reply (info or challenge) means the server is accepting players."""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.settimeout(timeout or constants.READY_PROBE_TIMEOUT)
+            s.sendto(constants.A2S_INFO_REQUEST, (host, int(port)))
+            data, _ = s.recvfrom(1400)
+            return data[:4] == b'\xFF\xFF\xFF\xFF'
+    except (OSError, ValueError):
+        return False
+
 def is_process_running(pid):
     if not pid: return False
     if psutil.pid_exists(pid):
@@ -233,36 +440,134 @@ def is_process_running(pid):
         except: pass
     return False
 
+# PID index: server_path -> (pid, create_time, exe). A hit costs one create_time/exe check.
+_pid_cache = {}
+pid_cache_stats = {'hits': 0, 'misses': 0, 'scans': 0, 'last_scan_ms': 0.0}
+
+def _verify_cached_pid(entry):
+    pid, create_time, exe = entry
+    try:
+        p = psutil.Process(pid)
+        return p.create_time() == create_time and p.exe() == exe and p.status() != psutil.STATUS_ZOMBIE
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return False
+
+def remember_server_pid(server_path, pid):
+    """Seeds the PID index (e.g. right after we spawned the server)."""
+    if not server_path or not pid: return
+    try:
+        p = psutil.Process(pid)
+        _pid_cache[os.path.normpath(server_path).lower()] = (pid, p.create_time(), p.exe())
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        pass
+
 def find_server_pid(server_path):
     """
     Finds a running VeinServer.exe process that specifically belongs to the given folder path.
     Prevents cross-talk between Live and Test servers.
+    The last known PID is verified first; only a miss triggers a full (name-filtered) scan.
     """
     if not server_path: return None
+    # Normalize slashes for comparison
+    norm_path = os.path.normpath(server_path).lower()
+    cached = _pid_cache.get(norm_path)
+    if cached and _verify_cached_pid(cached):
+        pid_cache_stats['hits'] += 1
+        return cached[0]
+    pid_cache_stats['misses'] += 1
+    _pid_cache.pop(norm_path, None)
+
+    started = time.perf_counter()
+    found = None
     try:
-        # Normalize slashes for comparison
-        norm_path = os.path.normpath(server_path).lower()
-        
-        for proc in psutil.process_iter(['pid', 'name', 'exe']):
+        # Only 'name' is fetched for every process; exe is resolved just for name matches
+        for proc in psutil.process_iter(['name']):
             try:
-                # Check Name
-                if proc.info['name'] == constants.SERVER_EXECUTABLE:
-                    # Check Executable Path
-                    proc_exe = proc.info['exe']
-                    if proc_exe:
-                        # proc_exe is usually .../Binaries/Win64/VeinServer.exe
-                        # We want to know if it lives inside our 'server_path'
-                        if norm_path in os.path.normpath(proc_exe).lower():
-                            return proc.info['pid']
+                if proc.info['name'] != constants.SERVER_EXECUTABLE: continue
+                # proc_exe is usually .../Binaries/Win64/VeinServer.exe
+                # We want to know if it lives inside our 'server_path'
+                proc_exe = proc.exe()
+                if proc_exe and norm_path in os.path.normpath(proc_exe).lower():
+                    _pid_cache[norm_path] = (proc.pid, proc.create_time(), proc_exe)
+                    found = proc.pid
+                    break
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                 pass
     except:
         pass
-    return None
+    pid_cache_stats['scans'] += 1
+    pid_cache_stats['last_scan_ms'] = (time.perf_counter() - started) * 1000
+    logger.debug(f"PID scan: {pid_cache_stats['last_scan_ms']:.1f} ms (found: {found})")
+    return found
+
+class ProcessMonitor:
+    """
+    Event-driven replacement for the 5 s status poll. watch() blocks a thread on the
+    process exiting (Popen.wait when we launched it, psutil wait for an attached PID) and
+    calls on_transition(state, info) the moment it happens. Only changes are emitted:
+    STARTING when we spawned it (ONLINE for an attached PID), ONLINE once mark_ready() is
+    called, then CRASHED or STOPPED (decided by expected_exit()).
+    """
+    def __init__(self, on_transition, expected_exit=lambda: False):
+        self.on_transition = on_transition
+        self.expected_exit = expected_exit
+        self.state = "OFFLINE"
+        self.pid = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def watch(self, pid, popen=None, starting=False):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self.pid = pid
+        self._emit("STARTING" if starting else "ONLINE", generation, pid=pid)
+        threading.Thread(target=self._wait, args=(pid, popen, generation), name=f"ProcessMonitor-{pid}", daemon=True).start()
+
+    def mark_ready(self, pid, **info):
+        """STARTING -> ONLINE for `pid` (ignored if it has already exited or been replaced)."""
+        with self._lock:
+            if self.pid != pid or self.state != "STARTING": return
+            generation = self._generation
+        self._emit("ONLINE", generation, pid=pid, **info)
+
+    def stop_watching(self):
+        """Detach (e.g. before a deliberate kill) so the exit is not reported as a crash."""
+        with self._lock:
+            self._generation += 1
+            self.pid = None
+            self.state = "OFFLINE"
+
+    def _wait(self, pid, popen, generation):
+        returncode = None
+        try:
+            if popen is not None:
+                returncode = popen.wait()
+            else:
+                returncode = psutil.Process(pid).wait()
+        except psutil.NoSuchProcess:
+            pass # Already gone
+        except Exception as e:
+            # No handle/permission for an attached process: fall back to a light poll
+            logger.debug(f"ProcessMonitor: wait() unavailable for PID {pid} ({e}), polling.")
+            while is_process_running(pid): time.sleep(0.25)
+        detected_at = time.perf_counter()
+        state = "STOPPED" if self.expected_exit() else "CRASHED"
+        self._emit(state, generation, pid=pid, returncode=returncode, detected_at=detected_at)
+
+    def _emit(self, state, generation, **info):
+        with self._lock:
+            if generation != self._generation or state == self.state: return
+            self.state = state
+            if state not in ("STARTING", "ONLINE"): self.pid = None
+        logger.debug(f"ProcessMonitor: {state} {info}")
+        self.on_transition(state, info)
 
 def kill_server_by_pid(pid):
-    """Surgically kills only the specified PID."""
-    if not pid: return
+    """Surgically kills only the specified PID. Returns {'terminate': s, 'taskkill': s} timings."""
+    timings = {'terminate': 0.0, 'taskkill': 0.0}
+    if not pid: return timings
+    t = time.perf_counter()
     try:
         logger.debug(f"Surgical Kill Requested for PID {pid}")
         # Python Kill
@@ -272,13 +577,17 @@ def kill_server_by_pid(pid):
             try: p.wait(timeout=5)
             except: p.kill()
     except: pass
+    timings['terminate'] = time.perf_counter() - t
     
     # Windows Taskkill Force (Safety Net) - PID ONLY
+    t = time.perf_counter()
     try:
         subprocess.run(['TASKKILL', '/F', '/PID', str(pid), '/T'], 
                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, 
                        creationflags=subprocess.CREATE_NO_WINDOW)
     except: pass
+    timings['taskkill'] = time.perf_counter() - t
+    return timings
 
 def check_prerequisites(server_path, steamcmd_path, log_callback):
     """Checks for required DLLs and copies them if missing."""
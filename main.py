@@ -12,7 +12,10 @@ import subprocess
 import threading
 import time
 import json
-import glob             
+import shutil
+import queue
+import atexit
+import multiprocessing
 import urllib.request   
 import webbrowser       
 from datetime import datetime, timedelta
@@ -23,6 +26,10 @@ try:
     import config
     import logger
     import logic
+    import analytics
+    import backfill
+    import telemetry
+    import backup
     import gui
 except ImportError as e:
     ctypes.windll.user32.MessageBoxW(0, f"Critical Import Error: {e}", "Boot Failed", 0x10)
@@ -48,14 +55,31 @@ class ServerManager:
         self.manual_shutdown_requested = False
         self.restart_requested = False
         self.server_was_running = False
-        self.is_backing_up = False
-        self.is_save_active = False # Sentinel Flag
+        self.is_backing_up = False # The single backup/restore slot (see claim_backup_slot)
+        self._backup_slot_lock = threading.Lock()
+        self.reactive_backup_pending = False
+        self.last_backup_at = None # time.monotonic() of the last finished backup (any trigger)
+        self.save_sentinel = logic.SaveSentinel()
+        self.ready_event = threading.Event() # Set by the LogReader on a readiness marker
+        self.server_spawned_at = 0.0 # time.time() of the last spawn (fresh Vein.log detection)
         self.crash_count = 0
         self.manager_update_available = False
         self.current_build_id = "Unknown"
         self.log_reader_active = False
         self.scheduler_warning_level = 0
-        self.player_history = {} 
+        self.player_db = None
+        self.process_monitor = logic.ProcessMonitor(self.on_server_transition, lambda: self.manual_shutdown_requested or self.restart_requested)
+        self.backup_source = gui.ListSource()
+        self.telemetry = None
+        self.restart_stats = telemetry.RestartStats()
+        self.restart_trace = None # Active telemetry.RestartTrace while a restart is in flight
+        self.telemetry_metric_choices = {label: key for key, label in telemetry.METRIC_LABELS.items()}
+        self.telemetry_window_choices = {"5 Minutes": 300, "1 Hour": 3600, "1 Day": 86400, "1 Week": 604800, "30 Days": 2592000}
+        self.telemetry_metric_var = tk.StringVar(value=telemetry.METRIC_LABELS['rss'])
+        self.telemetry_window_var = tk.StringVar(value="1 Hour")
+        self.log_queue = queue.Queue(maxsize=constants.LOG_QUEUE_MAX_LINES)
+        self.log_lines_dropped = 0
+        self.log_lines_coalesced = 0
         self.vcmd = (self.root.register(self.validate_number_input), '%P')
 
         # CONFIG VARS
@@ -66,7 +90,15 @@ class ServerManager:
         self.sched_days_vars = [tk.BooleanVar(value=True) for _ in range(7)]
         self.sched_interval_enabled = tk.BooleanVar(value=False)
         self.reactive_backup_enabled = tk.BooleanVar(value=True)
+        self.reactive_interval_var = tk.StringVar(value=str(constants.REACTIVE_BACKUP_MIN_INTERVAL))
         self.backup_on_stop = tk.BooleanVar(value=False)
+        self.backup_mode_var = tk.StringVar(value="Full Zip")
+        self.backup_codec_var = tk.StringVar(value="deflate")
+        self.backup_level_var = tk.StringVar(value=str(constants.BACKUP_LEVELS['deflate']))
+        self.backup_throttle_enabled = tk.BooleanVar(value=False)
+        self.backup_throttle_var = tk.StringVar(value=str(constants.BACKUP_THROTTLE_MBPS))
+        self.gfs_enabled_var = tk.BooleanVar(value=False)
+        self.gfs_vars = {tier: tk.StringVar(value=str(n)) for tier, n in constants.GFS_DEFAULTS.items()}
         self.auto_update_enabled = tk.BooleanVar(value=False)
         self.auto_update_passive = tk.BooleanVar(value=True)
         self.steam_branch_var = tk.StringVar(value="public")
@@ -74,6 +106,7 @@ class ServerManager:
         self.discord_webhook_url = tk.StringVar()
         self.community_url = tk.StringVar(value=constants.LINK_DISCORD_MAIN)
         self.player_filter_var = tk.StringVar(value="Online Now")
+        self.log_scrollback_var = tk.StringVar(value=str(constants.LOG_SCROLLBACK_LINES))
         self.admin_ids_var = tk.StringVar()
         self.profile_var = tk.StringVar()
         self.theme_var = tk.StringVar(value="Standard (Blue)")
@@ -89,7 +122,9 @@ class ServerManager:
         
         # BOOT
         logger.debug("Loading Player History...")
-        self.player_history = self.load_player_history()
+        self.player_db = self.load_player_history()
+        logger.start_safe_thread(self.player_db.run_flusher, "PlayerDBFlusher")
+        atexit.register(self.save_player_history)
         self.conf_parser = config.get_manager_config()
         geo = self.conf_parser.get('Manager', 'WindowGeometry', fallback='')
         if geo:
@@ -151,10 +186,14 @@ class ServerManager:
     # --- DASHBOARD ---
     def launch_dashboard(self):
         gui.create_main_layout(self)
+        self.root.after(constants.LOG_DRAIN_INTERVAL_MS, self.drain_log_queue)
         self.load_manager_config()
         self.apply_theme_selection(None)
         self.load_game_ini_settings()
         self.refresh_backup_list()
+        self.refresh_player_list_ui()
+        self.refresh_crash_summary()
+        self.refresh_restart_stats()
         self.refresh_profile_list()
         
         # Initial PID Search (Attach to existing)
@@ -164,9 +203,15 @@ class ServerManager:
             self.append_to_log_viewer(f">> System: Attached to running server (PID: {found_pid})")
             self.update_gui_for_state("ONLINE")
             logger.debug(f"Attached to PID {found_pid}")
+            self.process_monitor.watch(found_pid)
         
         # Start Threads using Logger Wrapper
-        logger.start_safe_thread(self.loop_status, "StatusLoop")
+        self.backup_verifier = backup.BackupVerifier(self.on_backup_verified)
+        logger.start_safe_thread(self.backup_verifier.run, "BackupVerifier")
+        self.telemetry = telemetry.TelemetrySampler(lambda: self.server_pid)
+        logger.start_safe_thread(self.telemetry.run, "Telemetry")
+        atexit.register(self.telemetry.save)
+        self.root.after(2000, self.refresh_telemetry_ui)
         logger.start_safe_thread(self.loop_scheduler, "SchedulerLoop")
         logger.start_safe_thread(self.loop_updater, "UpdaterLoop")
         
@@ -180,12 +225,16 @@ class ServerManager:
     def start_server(self, trigger="USER"):
         logger.event(trigger, "Start Requested.")
         server_path = self.path_entry.get()
+        trace = self.restart_trace
+        self.restart_trace = None # Re-armed below once the process is spawned
+        if trace: trace.begin('spawn')
         
         # Check if already running (Duplicate Prevention)
         existing_pid = logic.find_server_pid(server_path)
         if existing_pid:
             self.server_pid = existing_pid
             self.update_gui_for_state("ONLINE")
+            self.process_monitor.watch(existing_pid)
             messagebox.showinfo("Info", f"Server is already running (PID: {existing_pid}). Attached to it.")
             return
 
@@ -206,10 +255,18 @@ class ServerManager:
 
         try:
             logger.debug(f"Executing: {cmd}")
+            self.ready_event.clear()
             proc = subprocess.Popen(cmd)
+            self.server_spawned_at = time.time()
+            spawned = time.perf_counter()
+            if trace:
+                trace.begin('ready')
+                self.restart_trace = trace
             self.server_pid = proc.pid
+            logic.remember_server_pid(server_path, proc.pid)
             self.update_gui_for_state("STARTING")
-            logic.send_discord_webhook(self.discord_webhook_url.get(), "START", "Server Starting...", self.env_type=="TEST")
+            self.process_monitor.watch(proc.pid, proc, starting=True)
+            logger.start_safe_thread(lambda: self.wait_for_ready(proc.pid, spawned, self.query_port_entry.get()), "Readiness")
             if not self.log_reader_active:
                 logger.start_safe_thread(self.loop_log_reader, "LogReader")
         except Exception as e: messagebox.showerror("Error", str(e))
@@ -226,63 +283,78 @@ class ServerManager:
             self.update_gui_for_state("SHUTTING DOWN...")
             logger.start_safe_thread(self.shutdown_sequence, "Shutdown")
 
-    def restart_server(self):
+    def restart_server(self, trigger="USER"):
         self.disable_controls() # LOCKDOWN
         self.restart_requested = True
-        logger.event("USER", "Restart Requested.")
+        self.restart_trace = telemetry.RestartTrace(trigger)
+        logger.event(trigger, "Restart Requested.")
         self.stop_server() 
 
     def shutdown_with_backup_sequence(self):
         # Run backup synchronously in this thread
-        fmt = self.backup_format_entry.get()
-        ret = self.backup_retention_spinbox.get()
-        logic.create_backup(self.path_entry.get(), fmt, ret)
-        self.root.after(0, self.refresh_backup_list)
+        if self.restart_trace: self.restart_trace.begin('backup')
+        self.run_backup("STOP", wait=True) # Waits out a reactive/manual backup instead of racing it
         # Proceed to shutdown
         self.shutdown_sequence()
 
     def shutdown_sequence(self):
+        trace = self.restart_trace if self.restart_requested else None
+        if trace: trace.begin('sentinel')
+
         # --- THE SAVE SENTINEL (Safety Check) ---
-        timeout = 0
-        max_timeout = 60 # wait max 60 seconds
-        
-        while timeout < max_timeout:
-            # Check 1: Log Sentinel
-            is_saving_log = self.is_save_active
-            
-            # Check 2: Disk I/O (Backup Sentinel)
-            is_disk_busy = False
-            if self.server_pid:
-                is_disk_busy = logic.check_disk_activity(self.server_pid)
-            
-            if not is_saving_log and not is_disk_busy:
-                break # Safe to kill
-                
-            # Log verbose info for user
-            msg = f"⏳ SENTINEL: Waiting for Save... (Log: {is_saving_log} | Disk: {is_disk_busy}) - {timeout}s"
-            self.root.after(0, lambda m=msg: self.append_to_log_viewer(m))
-            time.sleep(1)
-            timeout += 1
+        # Check 1: Log Sentinel (save start/finish from the LogReader)
+        # Check 2: Disk I/O (rolling write rate from the telemetry sampler)
+        # Both must be quiet for SENTINEL_QUIET_MS at the same time.
+        quiet_s = constants.SENTINEL_QUIET_MS / 1000
+        deadline = time.monotonic() + constants.SENTINEL_TIMEOUT
+        waits = {'log': 0.0, 'disk': 0.0}
+        safe = False
+        if not self.save_sentinel.is_quiet(quiet_s):
+            self.append_to_log_viewer("⏳ SENTINEL: Waiting for Save to finish...")
+        while True:
+            t = time.monotonic()
+            log_ok = self.save_sentinel.wait_quiet(quiet_s, deadline)
+            waits['log'] += time.monotonic() - t
+            t = time.monotonic()
+            disk_ok = True
+            if self.server_pid and self.telemetry:
+                disk_ok = self.telemetry.wait_write_quiet(constants.SENTINEL_WRITE_THRESHOLD, quiet_s, deadline)
+            waits['disk'] += time.monotonic() - t
+            if not (log_ok and disk_ok): break
+            if self.save_sentinel.is_quiet(quiet_s): # No save started while waiting on disk
+                safe = True
+                break
 
-        if timeout >= max_timeout:
-             self.root.after(0, lambda: self.append_to_log_viewer("⚠️ SENTINEL: Timeout reached. Forcing Shutdown."))
-             logger.event("SENTINEL", "Force Shutdown due to Timeout.")
+        log_ms, disk_ms = int(waits['log'] * 1000), int(waits['disk'] * 1000)
+        if safe:
+            self.append_to_log_viewer(f"✅ SENTINEL: Safe to stop (save wait {log_ms} ms | disk wait {disk_ms} ms).")
+            logger.event("SENTINEL", "Quiet, proceeding with shutdown.", log_wait_ms=log_ms, disk_wait_ms=disk_ms)
+        else:
+             self.append_to_log_viewer("⚠️ SENTINEL: Timeout reached. Forcing Shutdown.")
+             logger.event("SENTINEL", "Force Shutdown due to Timeout.", log_wait_ms=log_ms, disk_wait_ms=disk_ms,
+                          saving=self.save_sentinel.saving)
 
-        # 1. Kill SPECIFIC Process ID
+        # 1. Kill SPECIFIC Process ID (detach the monitor first: this exit is intentional)
+        if trace: trace.begin('kill')
+        self.process_monitor.stop_watching()
         if self.server_pid:
-            logic.kill_server_by_pid(self.server_pid)
+            timings = logic.kill_server_by_pid(self.server_pid)
+            if trace:
+                for step, seconds in timings.items(): trace.add(f"kill.{step}", seconds)
 
         # 4. Cleanup UI
         self.server_pid = None
         self.server_was_running = False # <--- CRITICAL FIX: Tell Loop we are done
-        self.is_save_active = False 
+        self.save_sentinel.reset()
+        self.player_db.close_all_sessions()
         self.root.after(0, lambda: self.update_gui_for_state("OFFLINE"))
         self.root.after(0, lambda: self.pid_label.config(text="PID: -"))
         logic.send_discord_webhook(self.discord_webhook_url.get(), "STOP", "Server Stopped.", self.env_type=="TEST")
         
         # 5. Handle Restart if requested
         if self.restart_requested:
-            self.root.after(3000, lambda: self.start_server("RESTART"))
+            if trace: trace.begin('delay')
+            self.root.after(constants.RESTART_DELAY_MS, lambda: self.start_server("RESTART"))
             self.restart_requested = False
         else:
             # Explicitly reset flag if no restart
@@ -392,8 +464,10 @@ class ServerManager:
             else: port_msg = "Ports in use by another app!"
         fw = logic.check_firewall_rule()
         fw_msg = "Rule Found" if fw else "No Rule Found (Check Firewall)"
+        st = logic.pid_cache_stats
+        pid_msg = f"{st['hits']} hits / {st['misses']} misses, last scan {st['last_scan_ms']:.1f} ms"
         self.diag_status_label.config(text="Done", fg="green")
-        messagebox.showinfo("Health Check", f"Public IP: {pub_ip}\nStatus: {port_msg}\nFirewall: {fw_msg}")
+        messagebox.showinfo("Health Check", f"Public IP: {pub_ip}\nStatus: {port_msg}\nFirewall: {fw_msg}\nPID Lookup: {pid_msg}")
 
     # --- IO HANDLERS ---
     def save_all_settings(self, silent=False):
@@ -403,9 +477,18 @@ class ServerManager:
         c['Manager']['KeepAlive'] = str(self.keep_alive_var.get())
         c['Manager']['Theme'] = self.theme_var.get()
         c['Manager']['ActiveProfile'] = self.profile_var.get()
+        c['Manager']['LogScrollback'] = str(self.get_log_scrollback())
         if 'Backups' not in c: c['Backups'] = {}
         c['Backups']['Reactive'] = str(self.reactive_backup_enabled.get())
+        c['Backups']['ReactiveMinInterval'] = self.reactive_interval_var.get()
         c['Backups']['OnStop'] = str(self.backup_on_stop.get())
+        c['Backups']['Mode'] = constants.BACKUP_MODES.get(self.backup_mode_var.get(), "zip")
+        c['Backups']['Codec'] = self.backup_codec_var.get()
+        c['Backups']['Level'] = self.backup_level_var.get()
+        c['Backups']['Throttle'] = str(self.backup_throttle_enabled.get())
+        c['Backups']['ThrottleMBps'] = self.backup_throttle_var.get()
+        c['Backups']['GFS'] = str(self.gfs_enabled_var.get())
+        for tier, var in self.gfs_vars.items(): c['Backups'][f'Keep{tier.title()}'] = var.get()
         if 'Scheduler' not in c: c['Scheduler'] = {}
         c['Scheduler']['DailyEnabled'] = str(self.sched_daily_enabled.get())
         c['Scheduler']['IntervalEnabled'] = str(self.sched_interval_enabled.get())
@@ -479,6 +562,7 @@ class ServerManager:
         self.keep_alive_var.set(c.getboolean('Manager', 'KeepAlive', fallback=False))
         self.theme_var.set(c.get('Manager', 'Theme', fallback='Standard (Blue)'))
         self.profile_var.set(c.get('Manager', 'ActiveProfile', fallback=''))
+        self.log_scrollback_var.set(c.get('Manager', 'LogScrollback', fallback=str(constants.LOG_SCROLLBACK_LINES)))
         bak_fmt = c.get('Manager', 'BackupFormat', fallback="Server_Backup_%Y-%m-%d_%H-%M-%S")
         self.backup_format_entry.delete(0, tk.END); self.backup_format_entry.insert(0, bak_fmt)
         bak_ret = c.get('Manager', 'BackupRetention', fallback="20")
@@ -488,7 +572,18 @@ class ServerManager:
         except: pass
         if c.has_section('Backups'):
             self.reactive_backup_enabled.set(c.getboolean('Backups', 'Reactive', fallback=True))
+            self.reactive_interval_var.set(c.get('Backups', 'ReactiveMinInterval', fallback=str(constants.REACTIVE_BACKUP_MIN_INTERVAL)))
             self.backup_on_stop.set(c.getboolean('Backups', 'OnStop', fallback=False))
+            mode = c.get('Backups', 'Mode', fallback="zip")
+            self.backup_mode_var.set(next((k for k, v in constants.BACKUP_MODES.items() if v == mode), "Full Zip"))
+            self.backup_codec_var.set(c.get('Backups', 'Codec', fallback="deflate"))
+            level = c.get('Backups', 'Level', fallback=str(constants.BACKUP_LEVELS['deflate']))
+            self.update_backup_level_range()
+            self.backup_level_var.set(level)
+            self.backup_throttle_enabled.set(c.getboolean('Backups', 'Throttle', fallback=False))
+            self.backup_throttle_var.set(c.get('Backups', 'ThrottleMBps', fallback=str(constants.BACKUP_THROTTLE_MBPS)))
+            self.gfs_enabled_var.set(c.getboolean('Backups', 'GFS', fallback=False))
+            for tier, var in self.gfs_vars.items(): var.set(c.get('Backups', f'Keep{tier.title()}', fallback=str(constants.GFS_DEFAULTS[tier])))
         sch_times = c.get('Scheduler', 'Times', fallback="00:00, 04:00, 08:00, 12:00, 16:00, 20:00")
         self.sched_time_entry.delete(0, tk.END); self.sched_time_entry.insert(0, sch_times)
         if c.has_section('Scheduler'):
@@ -581,8 +676,10 @@ class ServerManager:
         self.save_button.config(state=s)
         
         # FIX: Ensure button text is reset
-        self.stop_button.config(state="normal" if state == "ONLINE" else "disabled", text="Stop")
-        self.restart_button.config(state="normal" if state == "ONLINE" else "disabled")
+        # STARTING too: a boot that hangs before readiness must still be stoppable
+        can_stop = "normal" if state in ("ONLINE", "STARTING") else "disabled"
+        self.stop_button.config(state=can_stop, text="Stop")
+        self.restart_button.config(state=can_stop)
         
         widgets_to_lock = [self.path_entry, self.map_combobox, self.port_entry, self.players_entry, self.session_name_entry, self.server_name_entry, self.server_desc_entry, self.server_password_entry, self.query_port_entry, self.rcon_port_entry, self.rcon_password_entry, self.http_api_port_entry, self.admin_id_entry]
         for w in widgets_to_lock:
@@ -593,10 +690,49 @@ class ServerManager:
              except: pass
 
     def append_to_log_viewer(self, text):
-        self.log_text.config(state='normal')
-        self.log_text.insert(tk.END, text + "\n") # Force newline for cleanliness
-        self.log_text.see(tk.END)
-        self.log_text.config(state='disabled')
+        """Thread-safe. Queues a line for the next UI flush (see drain_log_queue)."""
+        try:
+            self.log_queue.put_nowait(text)
+        except queue.Full:
+            self.log_lines_dropped += 1
+
+    def drain_log_queue(self):
+        """Runs on the Tk thread at LOG_DRAIN_INTERVAL_MS. One insert + one see() per batch."""
+        lines = []
+        try:
+            while len(lines) < constants.LOG_DRAIN_BATCH_MAX:
+                lines.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        if lines:
+            # Collapse runs of identical lines (log storms) into a single "(xN)" entry
+            merged = []
+            last, repeats = None, 0
+            for line in lines + [None]:
+                if line == last:
+                    repeats += 1
+                    continue
+                if last is not None:
+                    merged.append(f"{last}  (x{repeats})" if repeats > 1 else last)
+                    self.log_lines_coalesced += repeats - 1
+                last, repeats = line, 1
+
+            try:
+                self.log_text.config(state='normal')
+                self.log_text.insert(tk.END, "\n".join(merged) + "\n") # Force newline for cleanliness
+                gui.trim_text_widget(self.log_text, self.get_log_scrollback())
+                self.log_text.see(tk.END)
+                self.log_text.config(state='disabled')
+                self.log_stats_label.config(text=f"Dropped: {self.log_lines_dropped} | Coalesced: {self.log_lines_coalesced}")
+            except tk.TclError:
+                return # Widgets destroyed (closing)
+
+        self.root.after(constants.LOG_DRAIN_INTERVAL_MS, self.drain_log_queue)
+
+    def get_log_scrollback(self):
+        try: return int(self.log_scrollback_var.get())
+        except: return constants.LOG_SCROLLBACK_LINES
 
     def open_logs_folder(self):
         if os.path.exists(constants.LOGS_ROOT_DIR): os.startfile(constants.LOGS_ROOT_DIR)
@@ -605,29 +741,65 @@ class ServerManager:
         p = os.path.join(self.path_entry.get(), 'Backups')
         if os.path.exists(p): os.startfile(p)
 
-    def refresh_backup_list(self):
-        self.backup_list.delete(0, tk.END)
+    def get_backup_catalog(self):
         path = os.path.join(self.path_entry.get(), 'Backups')
-        if not os.path.exists(path): return
-        files = glob.glob(os.path.join(path, "*.zip"))
-        files.sort(key=os.path.getmtime, reverse=True)
-        for f in files:
-            name = os.path.basename(f)
-            size_mb = os.path.getsize(f) / (1024*1024)
-            self.backup_list.insert(tk.END, f"{name}  ({size_mb:.2f} MB)")
+        return backup.open_catalog(path) if os.path.exists(path) else None
+
+    def refresh_backup_list(self):
+        """Rows come from the backup catalog; reconcile() only lists the folder for outside changes."""
+        rows = []
+        catalog = self.get_backup_catalog()
+        if catalog:
+            catalog.reconcile()
+            for e in catalog.list():
+                files = f"{e['files']} files, " if e['files'] is not None else ""
+                check = {"ok": "✔ verified", "corrupt": "✖ CORRUPT"}.get(e.get('verify'), "unverified")
+                rows.append(f"{e['name']}  ({e['kind']}, {e['size'] / (1024*1024):.2f} MB, {files}{e['trigger']}, {datetime.fromtimestamp(e['created']):%Y-%m-%d %H:%M}) [{check}]")
+        self.backup_source.set_rows(rows)
+        self.backup_list.refresh()
+        self.refresh_retention_usage(catalog)
+
+    def get_retention_policy(self):
+        """GFS dict when tiered retention is enabled, else the Keep count."""
+        if not self.gfs_enabled_var.get(): return self.backup_retention_spinbox.get()
+        policy = {}
+        for tier, var in self.gfs_vars.items():
+            try: policy[tier] = max(0, int(var.get()))
+            except ValueError: policy[tier] = constants.GFS_DEFAULTS[tier]
+        return policy
+
+    def refresh_retention_usage(self, catalog):
+        """Space per GFS tier (and what the next prune would delete), per backup kind combined."""
+        policy = self.get_retention_policy()
+        if not catalog or not isinstance(policy, dict):
+            self.retention_usage_label.config(text="")
+            return
+        usage = {}
+        for kind in ("zip", "incremental"):
+            entries = catalog.list(kind)
+            decision = backup.gfs_retention([(e['name'], e['created']) for e in entries], **policy)
+            for tier, (n, size) in backup.retention_usage(entries, decision).items():
+                usage[tier] = (usage.get(tier, (0, 0))[0] + n, usage.get(tier, (0, 0))[1] + size)
+        parts = [f"{tier.title()}: {usage[tier][0]} ({usage[tier][1] / (1024*1024):,.1f} MB)" for tier in backup.GFS_TIERS + ['prune'] if tier in usage]
+        self.retention_usage_label.config(text=" | ".join(parts))
+
+    def get_selected_backup(self):
+        """Catalog entry for the selected Backups row (None if nothing selected)."""
+        row = self.backup_list.get_selected()
+        catalog = self.get_backup_catalog()
+        return catalog.get(row.split("  ")[0]) if row and catalog else None
 
     def purge_manager_logs(self):
         if messagebox.askyesno("Confirm", "Clear logs?"):
-            open(constants.EVENTS_LOG_FILE, 'w').close()
+            logger.purge_events()
 
     def reset_crash_counter(self):
         self.crash_count = 0
         self.crash_label.config(text="Crashes: 0", fg="#555")
 
     def ban_selected_player(self):
-        sel = self.players_listbox.curselection()
-        if not sel: return
-        text = self.players_listbox.get(sel[0])
+        text = self.players_list.get_selected()
+        if not text: return
         if "|" in text:
             parts = text.split("|")
             steamid = parts[1].strip()
@@ -646,32 +818,104 @@ class ServerManager:
         for b in bans:
             self.banned_list_text.insert(tk.END, b + "\n")
 
+    def refresh_telemetry_ui(self):
+        """Every 2 s: info-bar RAM/CPU + the performance chart."""
+        latest = self.telemetry.store.latest() if self.telemetry else None
+        if latest and self.server_pid and time.time() - latest[0] < 5:
+            row = dict(zip(telemetry.METRICS, latest[1]))
+            self.ram_label.config(text=f"RAM: {row['rss'] / (1024*1024):,.0f} MB | CPU: {row['cpu']:.0f}%")
+        else:
+            self.ram_label.config(text="RAM: - | CPU: -")
+        self.refresh_telemetry_chart()
+        self.root.after(2000, self.refresh_telemetry_ui)
+
+    def refresh_telemetry_chart(self):
+        if not self.telemetry: return
+        label = self.telemetry_metric_var.get()
+        metric = self.telemetry_metric_choices.get(label, 'rss')
+        points = self.telemetry.store.series(metric, self.telemetry_window_choices.get(self.telemetry_window_var.get(), 3600))
+        scale = 1 / (1024 * 1024) if metric in ('rss', 'private', 'read_bps', 'write_bps') else 1
+        gui.draw_chart(self.telemetry_canvas, [(t, v * scale) for t, v in points], label)
+
+    def refresh_crash_summary(self):
+        self.crash_summary_text.config(state='normal')
+        self.crash_summary_text.delete('1.0', tk.END)
+        summary = logger.get_crash_summary()
+        if not summary: self.crash_summary_text.insert(tk.END, "No crashes recorded.\n")
+        for fp, c in summary:
+            self.crash_summary_text.insert(tk.END, f"{c['count']:>6}x  {c['exception']:<22} {c['tag']:<24} last {c['last_seen']}  [{fp}]\n")
+        self.crash_summary_text.config(state='disabled')
+
+    def finish_restart_trace(self, trace):
+        phases = self.restart_stats.record(trace)
+        breakdown = " | ".join(f"{p} {phases[p]:.1f}s" for p in telemetry.RESTART_PHASES if p in phases and '.' not in p)
+        self.append_to_log_viewer(f"⏱️ RESTART ({trace.trigger}): {breakdown}")
+        logger.event("RESTART", "Restart completed.", trigger=trace.trigger, phases={k: round(v, 3) for k, v in phases.items()})
+        self.root.after(0, self.refresh_restart_stats)
+
+    def refresh_restart_stats(self):
+        self.restart_stats_text.config(state='normal')
+        self.restart_stats_text.delete('1.0', tk.END)
+        rows = self.restart_stats.summary()
+        if not rows: self.restart_stats_text.insert(tk.END, "No restarts recorded.\n")
+        else: self.restart_stats_text.insert(tk.END, f"{'Phase':<16}{'N':>5}{'p50':>9}{'p95':>9}{'max':>9}\n")
+        for phase, n, p50, p95, mx in rows:
+            self.restart_stats_text.insert(tk.END, f"{phase:<16}{n:>5}{p50:>8.2f}s{p95:>8.2f}s{mx:>8.2f}s\n")
+        last = self.restart_stats.last
+        if last: self.restart_stats_text.insert(tk.END, f"Last: {last['trigger']} at {datetime.fromtimestamp(last['time']):%Y-%m-%d %H:%M}, total {last['phases'].get('total', 0):.1f}s\n")
+        self.restart_stats_text.config(state='disabled')
+
     def load_player_history(self):
-        if os.path.exists(constants.HISTORY_FILE):
-            try: 
-                with open(constants.HISTORY_FILE, 'r') as f: 
-                    return json.load(f)
-            except: 
-                return {}
-        return {}
+        """Opens the SQLite player store (imports the legacy JSON history on first run)."""
+        return analytics.open_player_database()
 
     def save_player_history(self):
-        try:
-            with open(constants.HISTORY_FILE, 'w') as f:
-                json.dump(self.player_history, f, indent=4)
-        except: 
-            pass
+        """Flushes queued player events in one transaction."""
+        if self.player_db: self.player_db.flush()
+
+    def refresh_player_list_ui(self):
+        if not self.player_db: return
+        self.save_player_history() # Show events still waiting for the flusher
+        self.players_list.first = 0
+        self.players_list.refresh()
+        online = len(self.player_db.online_players())
+        peak = self.player_db.peak_concurrency(time.time() - 86400)
+        self.player_count_label.config(text=f"{self.players_list.total} players | {online} online | 24h peak {peak}")
+
+    def _player_query(self):
+        return {
+            "Online Now": {'online_only': True},
+            "Seen Last 7 Days": {'since_days': 7},
+            "Top Playtime": {'order': 'playtime'},
+        }.get(self.player_filter_var.get(), {})
+
+    def count_player_rows(self, text):
+        """VirtualList source for the Online Players tab."""
+        if not self.player_db: return 0
+        q = self._player_query()
+        return self.player_db.count_players(text, q.get('since_days'), q.get('online_only', False))
 
-    def refresh_player_list_ui(self, current_online_names=None):
-        mode = self.player_filter_var.get()
-        self.players_listbox.delete(0, tk.END)
-        if mode == "Online Now" and current_online_names:
-            for n in current_online_names: self.players_listbox.insert(tk.END, f"• {n}")
-        elif mode == "History (All Time)":
-            for sid, data in self.player_history.items():
-                name = data.get('name', 'Unknown')
-                last = data.get('last_seen', '?')
-                self.players_listbox.insert(tk.END, f"{name} | {sid} | {last}")
+    def fetch_player_rows(self, text, offset, limit):
+        if not self.player_db: return []
+        rows = self.player_db.query_players(text, limit=limit, offset=offset, **self._player_query())
+        return [f"{name} | {sid} | {analytics.format_time(last)} | {playtime / 3600:.1f}h"
+                for sid, name, first, last, playtime, sessions in rows]
+
+    def start_log_backfill(self):
+        logs_dir = os.path.join(self.path_entry.get(), 'Vein', 'Saved', 'Logs')
+        folder = filedialog.askdirectory(title="Folder with old Vein*.log files", initialdir=logs_dir if os.path.exists(logs_dir) else None)
+        if not folder: return
+        files = backfill.find_log_files(folder)
+        if not files:
+            messagebox.showinfo("Backfill", "No Vein*.log files found in that folder.")
+            return
+        def _run():
+            self.save_player_history()
+            r = backfill.backfill(files, self.player_db)
+            msg = f"Scanned {r['files']} files ({r['bytes'] / (1024*1024):.1f} MB) in {r['seconds']:.1f}s ({r['mb_per_s']:.1f} MB/s).\n{r['players']} players merged."
+            self.root.after(0, self.refresh_player_list_ui)
+            self.root.after(0, lambda: messagebox.showinfo("Backfill Complete", msg))
+        logger.start_safe_thread(_run, "LogBackfill")
 
     def loop_log_reader(self):
         self.log_reader_active = True
@@ -683,66 +927,107 @@ class ServerManager:
         if not os.path.exists(log_path): 
             self.log_reader_active = False
             return
+        ready_markers, _ = config.get_readiness_settings(self.conf_parser)
+        classifier = logic.LogClassifier(config.get_log_rules(self.conf_parser), ready_markers)
         try:
-            with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-                f.seek(0, 2) # Start at end
+            f = open(log_path, 'r', encoding='utf-8', errors='ignore')
+            # A Vein.log created by this boot is read from the top so early readiness markers are not skipped
+            fresh = self.server_spawned_at and os.stat(log_path).st_ctime >= self.server_spawned_at - 1
+            if not fresh: f.seek(0, 2) # Start at end
+            try:
                 while self.server_pid or self.server_was_running:
                     line = f.readline()
                     if line:
-                        self.root.after(0, lambda l=line.strip(): self.append_to_log_viewer(l))
-                        
+                        self.append_to_log_viewer(line.strip())
+                        event = classifier.classify(line)
+                        if event is None: continue
+
                         # --- SENTINEL LOGIC ---
-                        if constants.REGEX_SAVE_START in line:
-                            self.is_save_active = True
-                            self.root.after(0, lambda: self.append_to_log_viewer("🔒 SENTINEL: Auto-Save Started. Shutdown Locked."))
-                        if constants.REGEX_SAVE_FINISH_A in line or constants.REGEX_SAVE_FINISH_B in line:
-                            self.is_save_active = False
-                            self.root.after(0, lambda: self.append_to_log_viewer("🔓 SENTINEL: Save Complete. Lock Released."))
-
-                        data = logic.parse_log_line_for_analytics(line)
-                        if data and 'steamid' in data:
-                            sid = data['steamid']
-                            name = data.get('name', 'Unknown')
-                            if sid not in self.player_history:
-                                self.player_history[sid] = {'name': name, 'first_seen': str(datetime.now())}
-                            self.player_history[sid]['last_seen'] = str(datetime.now())
-                            self.player_history[sid]['name'] = name 
-                            self.save_player_history()
+                        if event.kind == "SAVE_START":
+                            self.save_sentinel.mark(True)
+                            self.append_to_log_viewer("🔒 SENTINEL: Auto-Save Started. Shutdown Locked.")
+                        elif event.kind == "SAVE_FINISH":
+                            self.save_sentinel.mark(False)
+                            self.append_to_log_viewer("🔓 SENTINEL: Save Complete. Lock Released.")
+                            if self.reactive_backup_enabled.get(): self.request_reactive_backup()
+                        elif event.kind == "READY":
+                            self.ready_event.set()
+                        elif event.kind == "CRASH":
+                            logger.event("SERVER", f"Crash marker in Vein.log: {line.strip()}")
+                        elif event.kind == "RULE":
+                            logger.event("LOGRULE", f"{event.rule}: {line.strip()}")
+                        elif event.kind == "PLAYER_LEAVE":
+                            self.player_db.record_leave(event.steamid, event.name)
+                        elif event.kind == "PLAYER_JOIN" and event.steamid:
+                            self.player_db.record_join(event.steamid, event.name)
+                        elif event.steamid:
+                            self.player_db.record_sighting(event.steamid, event.name)
+                    elif logic.log_rotated(f, log_path):
+                        # Server rotated Vein.log on boot: follow the new file from the top
+                        f.close()
+                        f = open(log_path, 'r', encoding='utf-8', errors='ignore')
                     else: time.sleep(0.5)
+            finally: f.close()
         except: pass
         self.log_reader_active = False
 
-    def loop_status(self):
-        while True:
-            time.sleep(5)
-            if self.server_pid:
-                if logic.is_process_running(self.server_pid):
-                    self.root.after(0, lambda: self.update_gui_for_state("ONLINE"))
-                    self.root.after(0, lambda: self.pid_label.config(text=f"PID: {self.server_pid}"))
-                    self.server_was_running = True
-                    if not self.log_reader_active:
-                         logger.start_safe_thread(self.loop_log_reader, "LogReader")
-                else:
-                    self.server_pid = None
-                    self.is_save_active = False # Reset on crash
-                    self.root.after(0, lambda: self.update_gui_for_state("OFFLINE"))
-                    
-                    # --- CRASH HANDLER WITH MANUAL STOP CHECK ---
-                    if self.server_was_running and not self.manual_shutdown_requested and not self.restart_requested:
-                        self.crash_count += 1
-                        logger.event("WATCHDOG", "Crash Detected.")
-                        logic.send_discord_webhook(self.discord_webhook_url.get(), "CRASH", "Crash Detected.", self.env_type=="TEST")
-                        if self.keep_alive_var.get():
-                            self.root.after(0, lambda: self.start_server("WATCHDOG"))
-                    
-                    self.server_was_running = False
-                    self.manual_shutdown_requested = False
-                    self.restart_requested = False
-            
-            # --- ZOMBIE CHECK (Was running, now None, but KeepAlive wants it back) ---
-            elif self.keep_alive_var.get() and self.server_was_running:
-                 if not self.manual_shutdown_requested: # <--- FIX: Respect the Stop button
-                     self.root.after(0, lambda: self.start_server("WATCHDOG"))
+    def wait_for_ready(self, pid, spawned, query_port):
+        """Readiness thread: STARTING -> ONLINE on a log marker or a query-port reply."""
+        markers, probe = config.get_readiness_settings(self.conf_parser)
+        probe = probe and str(query_port).isdigit()
+        source = None if (markers or probe) else "process" # Nothing to wait for: legacy behaviour
+        deadline = spawned + constants.READY_TIMEOUT
+        while source is None and self.server_pid == pid:
+            if self.ready_event.wait(constants.READY_PROBE_INTERVAL): source = "log"
+            elif probe and logic.probe_query_port(query_port): source = "query"
+            elif time.perf_counter() > deadline: source = "timeout"
+        if source is None: return # Exited or stopped before it was ready
+        boot = time.perf_counter() - spawned
+        self.restart_stats.record_value('boot_ready', boot)
+        if source == "timeout":
+            self.append_to_log_viewer(f"⚠️ READY: No readiness signal after {int(boot)}s. Assuming ONLINE.")
+        else:
+            self.append_to_log_viewer(f"✅ READY: Server accepting players after {boot:.1f}s ({source}).")
+        logger.event("SERVER", "Server ready.", pid=pid, source=source, boot_seconds=round(boot, 3))
+        self.process_monitor.mark_ready(pid, source=source, boot_seconds=boot)
+
+    def on_server_transition(self, state, info):
+        """ProcessMonitor callback (monitor thread). Fires once per state change."""
+        if state in ("STARTING", "ONLINE"):
+            self.server_was_running = True
+            self.root.after(0, lambda s=state: self.update_gui_for_state(s))
+            self.root.after(0, lambda p=info['pid']: self.pid_label.config(text=f"PID: {p}"))
+            if not self.log_reader_active:
+                 logger.start_safe_thread(self.loop_log_reader, "LogReader")
+            if state == "ONLINE":
+                trace, self.restart_trace = self.restart_trace, None
+                if trace: self.finish_restart_trace(trace)
+                if 'boot_seconds' in info: # Spawned by us (not an attach): players can join now
+                    logic.send_discord_webhook(self.discord_webhook_url.get(), "START", f"Server Online (ready in {info['boot_seconds']:.0f}s).", self.env_type=="TEST")
+            return
+
+        self.server_pid = None
+        self.save_sentinel.reset() # Reset on crash
+        if self.restart_trace and self.restart_trace.current == 'ready':
+            logger.event("RESTART", "Server exited before it was ready; restart trace discarded.", trigger=self.restart_trace.trigger)
+            self.restart_trace = None
+        self.player_db.close_all_sessions()
+        self.root.after(0, lambda: self.update_gui_for_state("OFFLINE"))
+        self.root.after(0, lambda: self.pid_label.config(text="PID: -"))
+
+        # --- CRASH HANDLER WITH MANUAL STOP CHECK ---
+        if state == "CRASHED" and self.server_was_running:
+            self.crash_count += 1
+            logger.event("WATCHDOG", "Crash Detected.", pid=info['pid'], returncode=info.get('returncode'))
+            self.root.after(0, lambda c=self.crash_count: self.crash_label.config(text=f"Crashes: {c}", fg="red"))
+            logic.send_discord_webhook(self.discord_webhook_url.get(), "CRASH", "Crash Detected.", self.env_type=="TEST")
+            if self.keep_alive_var.get():
+                self.restart_trace = telemetry.RestartTrace("WATCHDOG")
+                self.root.after(0, lambda: self.start_server("WATCHDOG"))
+
+        self.server_was_running = False
+        self.manual_shutdown_requested = False
+        self.restart_requested = False
 
     def loop_scheduler(self):
         while True:
@@ -777,7 +1062,7 @@ class ServerManager:
             elif diff <= 30: 
                 logger.event("SCHEDULER", "Restart Triggered.")
                 self.scheduler_warning_level = 0
-                self.root.after(0, self.restart_server)
+                self.root.after(0, lambda: self.restart_server("SCHEDULER"))
                 time.sleep(60) 
             
             # --- INTELLIGENT RESTART (PHASE 1) ---
@@ -810,17 +1095,210 @@ class ServerManager:
             self.create_backup_task()
 
     def create_backup_task(self, silent=False):
-        self.is_backing_up = True
         self.create_backup_button.config(state='disabled', text="Backing up...")
         def _bak():
-            fmt = self.backup_format_entry.get()
-            ret = self.backup_retention_spinbox.get()
-            logic.create_backup(self.path_entry.get(), fmt, ret)
+            result = self.run_backup()
+            if not silent: messagebox.showinfo("Backup", "Complete" if result else "Backup failed or skipped (see log).")
+        logger.start_safe_thread(_bak, "ManualBackup")
+
+    def claim_backup_slot(self, wait=False):
+        """Takes the single backup/restore slot (is_backing_up). Two runs at once could let one
+        prune/gc chunks the other has written but not yet referenced. False if busy and not wait."""
+        while True:
+            with self._backup_slot_lock:
+                if not self.is_backing_up:
+                    self.is_backing_up = True
+                    return True
+            if not wait: return False
+            time.sleep(0.2)
+
+    def update_backup_level_range(self, reset=False):
+        """Limits the Level spinbox to the codec's range; reset=True (codec changed) loads its default."""
+        codec = self.backup_codec_var.get()
+        low, high = constants.BACKUP_LEVEL_RANGES.get(codec, (0, 9))
+        self.backup_level_spinbox.config(from_=low, to=high)
+        if reset: self.backup_level_var.set(str(constants.BACKUP_LEVELS.get(codec, low)))
+
+    def run_backup(self, trigger="USER", wait=False):
+        """Synchronous backup with the current Backups tab settings (call from a worker thread).
+        Every backup goes through here and holds the backup slot while it runs; when the slot is
+        busy it waits (wait=True) or is skipped (returns None)."""
+        if not self.claim_backup_slot(wait):
+            self.append_to_log_viewer(f"⏭️ BACKUP: {trigger} backup skipped, another backup or restore is running.")
+            return None
+        self.root.after(0, lambda: self.create_backup_button.config(state='disabled', text="Backing up..."))
+        try: return self._run_backup(trigger)
+        finally:
             self.is_backing_up = False
             self.root.after(0, lambda: self.create_backup_button.config(state='normal', text="Create Backup"))
-            self.root.after(0, self.refresh_backup_list) 
-            if not silent: messagebox.showinfo("Backup", "Complete")
-        logger.start_safe_thread(_bak, "ManualBackup")
+            self.root.after(0, self.refresh_backup_list)
+
+    def _run_backup(self, trigger):
+        fmt = self.backup_format_entry.get()
+        ret = self.get_retention_policy()
+        mode = constants.BACKUP_MODES.get(self.backup_mode_var.get(), "zip")
+        try: level = int(self.backup_level_var.get())
+        except ValueError: level = None
+        throttle = 0
+        if self.backup_throttle_enabled.get():
+            try: throttle = max(1, int(self.backup_throttle_var.get()))
+            except ValueError: throttle = constants.BACKUP_THROTTLE_MBPS
+        impact = telemetry.BackupImpact(self.telemetry) if self.telemetry and self.server_pid else None
+        result = logic.create_backup(self.path_entry.get(), fmt, ret, mode, self.backup_codec_var.get(), level, trigger, throttle)
+        self.last_backup_at = time.monotonic()
+        if result:
+            self.append_to_log_viewer(f"💾 BACKUP: {os.path.basename(result['path'])} - {backup.format_result(result)}")
+            if impact: self.record_backup_impact(result, impact.finish(), throttle)
+            self.backup_verifier.enqueue(os.path.join(self.path_entry.get(), 'Backups'), result['name'])
+        else: self.append_to_log_viewer("⚠️ BACKUP: Failed (see debug log).")
+        return result
+
+    def record_backup_impact(self, result, impact, throttle):
+        """Server-side cost of one backup, logged and kept in the catalog so the throttle can be tuned."""
+        text = telemetry.format_impact(impact)
+        self.append_to_log_viewer(f"📉 BACKUP IMPACT: {text}" + (f" (throttle {throttle} MB/s)" if throttle else " (unthrottled)"))
+        fields = {f"impact_{m}": [None if v is None else round(v, 2) for v in pair] for m, pair in impact.items()}
+        logger.event("BACKUP", f"Backup impact: {result['name']}: {text}", throttle_mbps=throttle or None, **fields)
+        catalog = self.get_backup_catalog()
+        if catalog: catalog.update(result['name'], throttle_mbps=throttle or None, **fields)
+
+    def request_reactive_backup(self):
+        """SAVE_FINISH hook (LogReader thread). Queues one backup for when the save has settled,
+        unless one is running, already queued, or the last backup is within the min gap."""
+        if self.reactive_backup_pending or self.is_backing_up: return
+        try: gap = max(1, int(self.reactive_interval_var.get())) * 60
+        except ValueError: gap = constants.REACTIVE_BACKUP_MIN_INTERVAL * 60
+        if self.last_backup_at is not None and time.monotonic() - self.last_backup_at < gap: return
+        self.reactive_backup_pending = True
+        logger.start_safe_thread(self.run_reactive_backup, "ReactiveBackup")
+
+    def run_reactive_backup(self):
+        """Debounce: wait until no save has run for REACTIVE_BACKUP_DEBOUNCE and the server's disk
+        writes are idle, so the backup never races the game's own save I/O."""
+        try:
+            deadline = time.monotonic() + constants.SENTINEL_TIMEOUT
+            settled = self.save_sentinel.wait_quiet(constants.REACTIVE_BACKUP_DEBOUNCE, deadline)
+            if settled and self.server_pid and self.telemetry:
+                settled = self.telemetry.wait_write_quiet(constants.SENTINEL_WRITE_THRESHOLD, constants.SENTINEL_QUIET_MS / 1000.0, deadline)
+            if not settled:
+                logger.debug("Reactive backup skipped: saves/disk did not settle in time.")
+                return
+            if self.is_backing_up or not self.server_pid: return # Manual backup/restore or a stop got there first
+            self.run_backup("REACTIVE")
+        finally: self.reactive_backup_pending = False
+
+    def on_backup_verified(self, name, summary):
+        """BackupVerifier callback (verifier thread)."""
+        if summary['verify'] == "ok":
+            self.append_to_log_viewer(f"🔎 VERIFY: {name} OK ({summary['verify_mb_s']} MB/s, {summary['verify_seconds']:.1f}s)")
+        else:
+            self.append_to_log_viewer(f"❌ VERIFY: {name} is CORRUPT: {'; '.join(summary['verify_errors'][:3])}")
+        self.root.after(0, self.refresh_backup_list)
+
+    def verify_selected_backup(self):
+        entry = self.get_selected_backup()
+        if not entry: return messagebox.showinfo("Verify", "Select a backup first.")
+        self.backup_verifier.enqueue(os.path.join(self.path_entry.get(), 'Backups'), entry['name'])
+        self.append_to_log_viewer(f"🔎 VERIFY: {entry['name']} queued.")
+
+    def restore_full_backup(self):
+        """Replaces Vein/Saved with the selected backup. Extraction happens with the server still
+        running; it is only stopped for the directory swap, then started again."""
+        entry = self.get_selected_backup()
+        if not entry: return messagebox.showinfo("Restore", "Select a backup first.")
+        if entry.get('verify') == "corrupt": return messagebox.showerror("Restore", "This backup failed verification.")
+        was_running = self.server_pid is not None
+        note = "\n\nThe server will be stopped briefly for the swap and started again." if was_running else ""
+        if not messagebox.askyesno("Confirm Restore", f"Replace Vein/Saved with '{entry['name']}'?\n"
+                                   f"The current Saved folder is kept as a Saved.pre-restore-* snapshot.{note}"): return
+        saved_dir = os.path.join(self.path_entry.get(), 'Vein', 'Saved')
+        catalog = self.get_backup_catalog()
+        if not self.claim_backup_slot(): return messagebox.showwarning("Restore", "A backup or restore is already running.")
+        def _run():
+            staging, stopped = None, False
+            try:
+                self.append_to_log_viewer(f"♻️ RESTORE: Staging {entry['name']}...")
+                with backup.BackupReader(catalog, entry) as reader:
+                    staging, stats = backup.stage_restore(reader, saved_dir)
+                mb = stats['bytes'] / (1024*1024)
+                self.append_to_log_viewer(f"♻️ RESTORE: Staged and verified {stats['files']} files, {mb:,.1f} MB in {stats['seconds']:.1f}s ({mb / max(stats['seconds'], 1e-6):,.1f} MB/s)")
+                pid = self.server_pid
+                if pid:
+                    self.root.after(0, self.disable_controls)
+                    self.manual_shutdown_requested = True
+                    self.shutdown_sequence()
+                    stopped = True
+                    if not self.wait_saved_released(pid, constants.RESTORE_RELEASE_TIMEOUT):
+                        self.append_to_log_viewer("⚠️ RESTORE: Server/LogReader still holding Saved, trying the swap anyway.")
+                snapshot, swap_s = backup.swap_in(saved_dir, staging)
+                staging = None
+                self.append_to_log_viewer(f"♻️ RESTORE: Swapped in {swap_s * 1000:.0f} ms. Previous Saved kept as {os.path.basename(snapshot or '-')}")
+                logger.event("BACKUP", f"Full restore of {entry['name']}", snapshot=snapshot, swap_ms=round(swap_s * 1000, 1),
+                             stage_seconds=round(stats['seconds'], 3), files=stats['files'], bytes=stats['bytes'])
+            except Exception as e:
+                logger.debug(f"Full restore failed: {e}")
+                if staging: shutil.rmtree(staging, ignore_errors=True) # Swap failed: do not leave a full copy behind
+                self.append_to_log_viewer(f"❌ RESTORE: Failed, live Saved untouched: {e}")
+                self.root.after(0, lambda: messagebox.showerror("Restore", f"Restore failed: {e}"))
+            finally:
+                self.is_backing_up = False
+                if stopped: self.root.after(0, lambda: self.start_server("RESTORE")) # Back up either way
+        logger.start_safe_thread(_run, "BackupFullRestore")
+
+    def wait_saved_released(self, pid, timeout):
+        """After a stop: waits for the PID to exit and the LogReader to close Vein.log, since
+        Windows refuses to rename a directory that holds an open file. False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self.log_reader_active or logic.is_process_running(pid):
+            if time.monotonic() >= deadline: return False
+            time.sleep(0.1)
+        return True
+
+    def restore_selected_files(self):
+        """Single file / subfolder restore by random access (the rest of the archive is never read)."""
+        entry = self.get_selected_backup()
+        if not entry: return messagebox.showinfo("Restore", "Select a backup first.")
+        catalog = self.get_backup_catalog()
+        try:
+            with backup.BackupReader(catalog, entry) as reader:
+                names = reader.folders() + [n for n, _ in reader.members()]
+        except Exception as e:
+            return messagebox.showerror("Restore", f"Cannot open backup: {e}")
+        def _restore(prefix, dest):
+            def _run():
+                try:
+                    with backup.BackupReader(catalog, entry) as reader: r = reader.restore(prefix, dest)
+                    msg = f"Restored {r['files']} file(s), {r['bytes'] / (1024*1024):,.1f} MB in {r['seconds']:.2f}s"
+                    self.append_to_log_viewer(f"♻️ RESTORE: {prefix} from {entry['name']} -> {dest}. {msg}")
+                    logger.event("BACKUP", f"Partial restore of {prefix} from {entry['name']}", dest=dest, **r)
+                    self.root.after(0, lambda: messagebox.showinfo("Restore", msg))
+                except Exception as e:
+                    logger.debug(f"Partial restore failed: {e}")
+                    self.root.after(0, lambda: messagebox.showerror("Restore", f"Restore failed: {e}"))
+            logger.start_safe_thread(_run, "BackupRestore")
+        gui.create_restore_dialog(self, f"Restore from {entry['name']}", names, _restore)
+
+    def export_selected_backup(self):
+        """Incremental backups are manifests: rebuild a regular zip next to them on demand."""
+        entry = self.get_selected_backup()
+        if not entry or entry['kind'] != "incremental":
+            messagebox.showinfo("Export", "Select an incremental backup to export.")
+            return
+        name = os.path.basename(entry['file'])[:-5]
+        server_path = self.path_entry.get()
+        def _export():
+            try:
+                start = time.perf_counter()
+                out = logic.get_backup_store(server_path).export_zip(name, os.path.join(server_path, 'Backups', name + "_export.zip"))
+                backup.open_catalog(os.path.join(server_path, 'Backups')).add(
+                    name + "_export", "zip", {'path': out, 'files': entry['files'], 'bytes': entry['bytes'], 'archive_bytes': os.path.getsize(out)},
+                    "EXPORT", entry['build'])
+                self.append_to_log_viewer(f"📦 EXPORT: {os.path.basename(out)} in {time.perf_counter() - start:.1f}s")
+                self.root.after(0, self.refresh_backup_list)
+            except Exception as e:
+                logger.debug(f"Backup export failed: {e}")
+                self.root.after(0, lambda: messagebox.showerror("Export", f"Export failed: {e}"))
+        logger.start_safe_thread(_export, "BackupExport")
 
     def start_steamcmd_update(self):
         self.notebook.select(5)
@@ -844,15 +1322,18 @@ class ServerManager:
 
     def update_console(self, text):
         self.steamcmd_console_output.insert(tk.END, text)
+        gui.trim_text_widget(self.steamcmd_console_output, self.get_log_scrollback())
         self.steamcmd_console_output.see(tk.END)
 
     def on_closing(self):
+        self.save_player_history()
         self.save_window_geometry()
         config.save_manager_config(self.conf_parser)
         self.root.destroy()
         sys.exit(0)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Backfill worker processes in the frozen .exe
     logger.setup() # <--- HOOKS CRASH HANDLER
     # Removed global try/except block to allow hooks to work
     root = tk.Tk()
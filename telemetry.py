@@ -0,0 +1,335 @@
+# --- VERSION & IDENTITY ---
+# MANAGER_VERSION = "v4.4.5 (Stable Release)"
+
+# telemetry.py
+import os
+import math
+import time
+import json
+import struct
+import threading
+from array import array
+import psutil
+import constants
+import logger
+
+METRICS = ['cpu', 'rss', 'private', 'threads', 'handles', 'read_bps', 'write_bps', 'io_latency']
+METRIC_LABELS = {
+    'cpu': "CPU %", 'rss': "RAM (RSS MB)", 'private': "Private MB", 'threads': "Threads",
+    'handles': "Handles", 'read_bps': "Disk Read MB/s", 'write_bps': "Disk Write MB/s",
+    'io_latency': "Disk Latency ms",
+}
+# (step_seconds, capacity): 1 s for an hour, 1 min for a day, 15 min for a month
+TIERS = [(1, 3600), (60, 1440), (900, 2976)]
+FILE_MAGIC = b'VTEL'
+FILE_VERSION = 2
+# Restart phases in the order they happen (kill.* are sub-timings of kill)
+RESTART_PHASES = ['backup', 'sentinel', 'kill', 'kill.terminate', 'kill.taskkill', 'delay', 'spawn', 'ready', 'total', 'boot_ready']
+
+class RingSeries:
+    """Fixed-size, array-backed ring of (time, metric values) at one resolution."""
+    def __init__(self, step, capacity):
+        self.step = step
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.values = [array('d', bytes(8 * capacity)) for _ in METRICS]
+        self.head = 0  # Next write slot
+        self.count = 0
+
+    def append(self, t, row):
+        i = self.head
+        self.times[i] = t
+        for col, v in zip(self.values, row): col[i] = v
+        self.head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def window(self, metric_idx, since):
+        """[(t, v)] oldest -> newest with t >= since."""
+        out = []
+        start = (self.head - self.count) % self.capacity
+        col = self.values[metric_idx]
+        for n in range(self.count):
+            i = (start + n) % self.capacity
+            if self.times[i] >= since: out.append((self.times[i], col[i]))
+        return out
+
+    def latest(self):
+        if not self.count: return None
+        i = (self.head - 1) % self.capacity
+        return self.times[i], [col[i] for col in self.values]
+
+    def dump(self):
+        header = struct.pack('<dIII', self.step, self.capacity, self.head, self.count)
+        return header + self.times.tobytes() + b''.join(col.tobytes() for col in self.values)
+
+    def load(self, blob, offset):
+        step, capacity, head, count = struct.unpack_from('<dIII', blob, offset)
+        offset += struct.calcsize('<dIII')
+        size = 8 * capacity
+        if step != self.step or capacity != self.capacity: return None # Layout changed: discard
+        self.times = array('d', blob[offset:offset + size]); offset += size
+        for k in range(len(METRICS)):
+            self.values[k] = array('d', blob[offset:offset + size]); offset += size
+        self.head, self.count = head, count
+        return offset
+
+class TelemetryStore:
+    """Multi-resolution store. Tier 0 gets raw samples; higher tiers get bucket averages."""
+    def __init__(self):
+        self.tiers = [RingSeries(step, cap) for step, cap in TIERS]
+        self._acc = [None for _ in TIERS]  # Per higher tier: [bucket, sums, n]
+        self._lock = threading.Lock()
+
+    def add(self, t, row):
+        with self._lock:
+            self.tiers[0].append(t, row)
+            for k in range(1, len(self.tiers)):
+                tier = self.tiers[k]
+                bucket = int(t // tier.step)
+                acc = self._acc[k]
+                if acc is not None and acc[0] != bucket:
+                    tier.append(acc[0] * tier.step, [s / acc[2] for s in acc[1]])
+                    acc = None
+                if acc is None: acc = self._acc[k] = [bucket, [0.0] * len(METRICS), 0]
+                for j, v in enumerate(row): acc[1][j] += v
+                acc[2] += 1
+
+    def series(self, metric, seconds, max_points=300):
+        """Points for the last `seconds` from the coarsest tier that still resolves the window."""
+        idx = METRICS.index(metric)
+        since = time.time() - seconds
+        with self._lock:
+            covering = [t for t in self.tiers if t.step * t.capacity >= seconds] or [self.tiers[-1]]
+            tier = next((t for t in covering if seconds / t.step <= max_points * 5), covering[-1])
+            points = tier.window(idx, since)
+        if len(points) > max_points:
+            stride = -(-len(points) // max_points)
+            points = [points[i] for i in range(0, len(points), stride)]
+        return points
+
+    def recent(self, metric, seconds):
+        """Raw 1 s samples for the last `seconds` (used for rolling rates)."""
+        with self._lock:
+            return [v for _, v in self.tiers[0].window(METRICS.index(metric), time.time() - seconds)]
+
+    def latest(self):
+        with self._lock:
+            return self.tiers[0].latest()
+
+    def save(self, path):
+        with self._lock:
+            blob = FILE_MAGIC + struct.pack('<HH', FILE_VERSION, len(self.tiers)) + b''.join(t.dump() for t in self.tiers)
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f: f.write(blob)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        try:
+            with open(path, 'rb') as f: blob = f.read()
+            if blob[:4] != FILE_MAGIC: return False
+            version, n = struct.unpack_from('<HH', blob, 4)
+            if version != FILE_VERSION or n != len(self.tiers): return False
+            offset = 8
+            with self._lock:
+                for tier in self.tiers:
+                    offset = tier.load(blob, offset)
+                    if offset is None: return False
+            return True
+        except (OSError, struct.error):
+            return False
+
+class TelemetrySampler:
+    """Samples the server PID (from pid_fn) every TELEMETRY_INTERVAL seconds."""
+    def __init__(self, pid_fn, path=None):
+        self.pid_fn = pid_fn
+        self.path = path or constants.TELEMETRY_FILE
+        self.store = TelemetryStore()
+        if os.path.exists(self.path) and not self.store.load(self.path):
+            logger.debug("Telemetry: stored history incompatible, starting fresh.")
+        self._proc = None
+        self._last_io = None
+        self._last_disk = None
+        self._sampled = threading.Condition()
+
+    def sample(self):
+        pid = self.pid_fn()
+        if not pid:
+            self._proc = self._last_io = None
+            return None
+        try:
+            if self._proc is None or self._proc.pid != pid:
+                self._proc = psutil.Process(pid)
+                self._proc.cpu_percent(None) # Prime the CPU counter
+                self._last_io = None
+            p = self._proc
+            with p.oneshot():
+                now = time.time()
+                mem = p.memory_info()
+                io = p.io_counters()
+                cpu = p.cpu_percent(None)
+                threads = p.num_threads()
+                handles = p.num_handles() if hasattr(p, 'num_handles') else p.num_fds()
+            read_bps = write_bps = 0.0
+            if self._last_io:
+                t0, r0, w0 = self._last_io
+                dt = max(now - t0, 1e-3)
+                read_bps, write_bps = (io.read_bytes - r0) / dt, (io.write_bytes - w0) / dt
+            self._last_io = (now, io.read_bytes, io.write_bytes)
+            row = [cpu, mem.rss, getattr(mem, 'private', mem.rss), threads, handles, read_bps, write_bps, self.disk_latency()]
+            self.store.add(now, row)
+            with self._sampled: self._sampled.notify_all()
+            return row
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            self._proc = self._last_io = None
+            return None
+
+    def disk_latency(self):
+        """Mean ms per disk operation since the last call (all disks; psutil has no per-process latency)."""
+        try: disk = psutil.disk_io_counters()
+        except Exception: disk = None
+        if disk is None: return 0.0
+        busy, ops = disk.read_time + disk.write_time, disk.read_count + disk.write_count
+        last, self._last_disk = self._last_disk, (busy, ops)
+        if not last or ops <= last[1]: return 0.0
+        return (busy - last[0]) / (ops - last[1])
+
+    def wait_write_quiet(self, threshold, quiet_s, deadline):
+        """Blocks until every write sample in the last quiet_s is below threshold bytes/s.
+        Re-checks on each new sample; False if the monotonic deadline passes first."""
+        with self._sampled:
+            while True:
+                values = self.store.recent('write_bps', quiet_s)
+                if not values or max(values) < threshold: return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: return False
+                self._sampled.wait(min(remaining, constants.TELEMETRY_INTERVAL * 2))
+
+    def save(self):
+        try: self.store.save(self.path)
+        except Exception as e: logger.debug(f"Telemetry save failed: {e}")
+
+    def run(self):
+        last_save = time.time()
+        while True:
+            started = time.time()
+            self.sample()
+            if started - last_save >= constants.TELEMETRY_SAVE_INTERVAL:
+                self.save()
+                last_save = started
+            time.sleep(max(0.0, constants.TELEMETRY_INTERVAL - (time.time() - started)))
+
+# --- BACKUP IMPACT ---
+IMPACT_METRICS = ['cpu', 'io_latency', 'read_bps', 'write_bps']
+
+class BackupImpact:
+    """Server CPU, disk latency and I/O over the BACKUP_IMPACT_BASELINE seconds before a backup
+    vs. while it ran, from the 1 s tier. Create it just before the backup, finish() right after."""
+    def __init__(self, sampler):
+        self.store = sampler.store
+        self.started = time.time()
+        self.before = self._means(constants.BACKUP_IMPACT_BASELINE)
+
+    def _means(self, seconds):
+        out = {}
+        for metric in IMPACT_METRICS:
+            values = self.store.recent(metric, seconds)
+            out[metric] = sum(values) / len(values) if values else None
+        return out
+
+    def finish(self):
+        """{metric: (before, during)}; None where no sample landed (e.g. sub-second backups)."""
+        during = self._means(max(time.time() - self.started, constants.TELEMETRY_INTERVAL))
+        return {m: (self.before[m], during[m]) for m in IMPACT_METRICS}
+
+def format_impact(impact):
+    def pair(metric, fmt):
+        before, during = impact[metric]
+        if before is None or during is None: return "n/a"
+        return f"{fmt(before)} -> {fmt(during)}"
+    return (f"server CPU {pair('cpu', lambda v: f'{v:.0f}%')}, disk latency {pair('io_latency', lambda v: f'{v:.1f} ms')}, "
+            f"server writes {pair('write_bps', lambda v: f'{v / (1024 * 1024):.1f} MB/s')}")
+
+# --- RESTART TRACING ---
+class RestartTrace:
+    """One restart (or watchdog respawn) timed phase by phase. Phases are sequential:
+    begin() closes the running phase and opens the next."""
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.current = None
+        self._phase_start = 0.0
+
+    def begin(self, phase):
+        now = time.perf_counter()
+        self._close(now)
+        self.current, self._phase_start = phase, now
+
+    def add(self, phase, seconds):
+        """Records a sub-timing measured elsewhere (e.g. inside kill_server_by_pid)."""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def finish(self):
+        now = time.perf_counter()
+        self._close(now)
+        self.phases['total'] = now - self.started
+        return self.phases
+
+    def _close(self, now):
+        if self.current: self.add(self.current, now - self._phase_start)
+        self.current = None
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values: return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+class RestartStats:
+    """Last RESTART_STATS_SAMPLES durations per phase, persisted to restart_stats.json."""
+    def __init__(self, path=None):
+        self.path = path or constants.RESTART_STATS_FILE
+        self.samples = {}
+        self.last = None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f: data = json.load(f)
+            self.samples = data.get('samples', {})
+            self.last = data.get('last')
+        except (OSError, ValueError): pass
+        self._lock = threading.Lock()
+
+    def record(self, trace):
+        phases = trace.finish()
+        with self._lock:
+            for phase, seconds in phases.items(): self._add(phase, seconds)
+            self.last = {'trigger': trace.trigger, 'time': time.time(), 'phases': {k: round(v, 3) for k, v in phases.items()}}
+        self._save()
+        return phases
+
+    def record_value(self, phase, seconds):
+        """Standalone sample, e.g. 'boot_ready' (spawn -> ready) for every boot."""
+        with self._lock: self._add(phase, seconds)
+        self._save()
+
+    def _add(self, phase, seconds):
+        values = self.samples.setdefault(phase, [])
+        values.append(round(seconds, 3))
+        del values[:-constants.RESTART_STATS_SAMPLES]
+
+    def _save(self):
+        with self._lock: data = json.dumps({'samples': self.samples, 'last': self.last})
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f: f.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e: logger.debug(f"Restart stats save failed: {e}")
+
+    def summary(self):
+        """[(phase, count, p50, p95, max)] in RESTART_PHASES order."""
+        with self._lock:
+            rows = []
+            for phase in RESTART_PHASES + sorted(set(self.samples) - set(RESTART_PHASES)):
+                values = sorted(self.samples.get(phase, []))
+                if values: rows.append((phase, len(values), percentile(values, 50), percentile(values, 95), values[-1]))
+            return rows
@@ -0,0 +1,11 @@
+# --- VERSION & IDENTITY ---
+# MANAGER_VERSION = "v4.4.5 (Stable Release)"
+
+# tests/conftest.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import constants
+
+constants.DEBUG_MODE = False # Keep test runs from writing debug_crash.log / Manager_Logs
@@ -0,0 +1,36 @@
+# --- VERSION & IDENTITY ---
+# MANAGER_VERSION = "v4.4.5 (Stable Release)"
+
+# tests/test_log_classifier.py
+import re
+import pytest
+import logic
+
+# (pattern, line the rule must match)
+USER_RULES = [
+    (r'foo{0,3}', "LogTemp: fo"),
+    (r'x\d{10,20}', "LogTemp: x12345678901"),
+    (r'Kick(ed player)?', "LogNet: Kick bob"),
+    (r'banned(?: by admin)?', "LogNet: bob banned"),
+    (r'Timeout|Disconnected', "LogNet: Disconnected"),
+    (r'(?i)anticheat', "LogVein: AntiCheat violation"),
+    (r'Kicked\s+\w+', "LogNet: Kicked bob"),
+    (r'colou?r', "LogTemp: color"),
+]
+
+@pytest.mark.parametrize("pattern,line", USER_RULES)
+def test_prefilter_literal_is_in_every_match(pattern, line):
+    assert re.search(pattern, line)
+    assert logic._required_literal(pattern) in line
+
+@pytest.mark.parametrize("pattern,line", USER_RULES)
+def test_user_rule_fires(pattern, line):
+    event = logic.LogClassifier({'rule': pattern}).classify(line)
+    assert event is not None and event.kind == "RULE" and event.rule == 'rule'
+
+def test_plain_pattern_keeps_a_prefilter():
+    assert logic._required_literal(r'Kicked\s+\w+') == 'Kicked'
+    assert logic._required_literal(r'LogNet: Timeout.*') == 'LogNet: Timeout'
+
+def test_unrelated_line_does_not_fire():
+    assert logic.LogClassifier({'rule': r'Kick(ed player)?'}).classify("LogNet: Join bob") is None
@@ -0,0 +1,71 @@
+# --- VERSION & IDENTITY ---
+# MANAGER_VERSION = "v4.4.5 (Stable Release)"
+
+# tests/test_process_monitor.py
+import sys
+import time
+import queue
+import subprocess
+import pytest
+import logic
+
+DETECT_BOUND = 1.0 # Seconds from kill() to CRASHED; the old poll took up to 5 s
+
+@pytest.fixture
+def child():
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    yield proc
+    if proc.poll() is None: proc.kill()
+    try: proc.wait(timeout=5)
+    except (subprocess.TimeoutExpired, ChildProcessError): pass
+
+def make_monitor(expected_exit=lambda: False):
+    events = queue.Queue()
+    monitor = logic.ProcessMonitor(lambda state, info: events.put((state, info, time.perf_counter())), expected_exit)
+    return monitor, events
+
+def wait_for(events, state, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try: got, info, at = events.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty: break
+        if got == state: return info, at
+    return None
+
+@pytest.mark.parametrize("use_popen", [True, False], ids=["popen", "psutil-attach"])
+def test_crash_detected_within_bound(child, use_popen):
+    monitor, events = make_monitor()
+    monitor.watch(child.pid, child if use_popen else None)
+    assert wait_for(events, "ONLINE", 1.0)
+    killed_at = time.perf_counter()
+    child.kill()
+    got = wait_for(events, "CRASHED", DETECT_BOUND + 1.0)
+    assert got is not None, "CRASHED was not emitted"
+    info, at = got
+    assert info['pid'] == child.pid
+    assert at - killed_at < DETECT_BOUND
+    assert monitor.state == "CRASHED" and monitor.pid is None
+
+def test_expected_exit_is_reported_as_stopped(child):
+    monitor, events = make_monitor(expected_exit=lambda: True)
+    monitor.watch(child.pid, child)
+    child.kill()
+    assert wait_for(events, "STOPPED", DETECT_BOUND + 1.0)
+
+def test_stop_watching_suppresses_crash(child):
+    monitor, events = make_monitor()
+    monitor.watch(child.pid, child)
+    assert wait_for(events, "ONLINE", 1.0)
+    monitor.stop_watching()
+    child.kill()
+    child.wait(timeout=5)
+    assert wait_for(events, "CRASHED", DETECT_BOUND) is None
+    assert monitor.state == "OFFLINE"
+
+def test_starting_then_ready(child):
+    monitor, events = make_monitor()
+    monitor.watch(child.pid, child, starting=True)
+    assert wait_for(events, "STARTING", 1.0)
+    monitor.mark_ready(child.pid, source="log")
+    info, _ = wait_for(events, "ONLINE", 1.0)
+    assert info == {'pid': child.pid, 'source': "log"}
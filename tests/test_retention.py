@@ -0,0 +1,99 @@
+# --- VERSION & IDENTITY ---
+# MANAGER_VERSION = "v4.4.5 (Stable Release)"
+
+# tests/test_retention.py
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import backup
+
+UTC = timezone.utc
+
+def at(*args):
+    return datetime(*args, tzinfo=UTC).timestamp()
+
+def hourly_series(end, hours):
+    """One backup per hour, newest first, named by their UTC time."""
+    out = []
+    for i in range(hours):
+        t = end - timedelta(hours=i)
+        out.append((t.strftime("%Y-%m-%d_%H"), t.timestamp()))
+    return out
+
+def keep(backups, **limits):
+    return backup.gfs_retention(backups, tz=UTC, **limits)
+
+def kept(decision, tier=None):
+    return sorted(n for n, t in decision.items() if t and (tier is None or t == tier))
+
+def test_hourly_keeps_exactly_n_newest_hours():
+    series = hourly_series(datetime(2026, 10, 18, 12, tzinfo=UTC), 48)
+    d = keep(series, hourly=24)
+    assert len(kept(d)) == 24
+    assert "2026-10-18_12" in kept(d) and "2026-10-17_13" in kept(d)
+    assert d["2026-10-17_12"] is None # 25th hour is pruned
+
+def test_hourly_keeps_newest_backup_within_an_hour():
+    b = [("a", at(2026, 10, 18, 12, 5)), ("b", at(2026, 10, 18, 12, 55)), ("c", at(2026, 10, 18, 11, 59))]
+    d = keep(b, hourly=2)
+    assert d == {"b": 'hourly', "c": 'hourly', "a": None}
+
+def test_daily_day_boundary():
+    b = [("late", at(2026, 10, 17, 23, 59, 59)), ("early", at(2026, 10, 18, 0, 0, 0)), ("mid", at(2026, 10, 17, 12))]
+    d = keep(b, daily=2)
+    assert d == {"early": 'daily', "late": 'daily', "mid": None}
+
+def test_overlap_counts_newest_backup_once():
+    b = hourly_series(datetime(2026, 10, 18, 23, tzinfo=UTC), 24 * 3)
+    d = keep(b, hourly=1, daily=3, weekly=1, monthly=1)
+    # The newest backup satisfies all four tiers but is reported under the first one only
+    assert d["2026-10-18_23"] == 'hourly'
+    assert Counter(d.values()) == Counter({'hourly': 1, 'daily': 2, None: 69})
+    # Its day still counts against the daily limit: the two older days get the other daily slots
+    assert kept(d, 'daily') == ["2026-10-16_23", "2026-10-17_23"]
+
+def test_all_zero_limits_keep_nothing():
+    series = hourly_series(datetime(2026, 10, 18, 12, tzinfo=UTC), 10)
+    assert set(keep(series).values()) == {None}
+    assert set(keep(series, hourly=0, daily=0, weekly=0, monthly=0).values()) == {None}
+
+def test_empty_input():
+    assert keep([], hourly=5, daily=5, weekly=5, monthly=5) == {}
+
+def test_iso_week_rollover_across_year_end():
+    # 2026-12-31 is ISO 2026-W53 (Thursday); 2027-01-04 is ISO 2027-W01 (Monday)
+    b = [("w53_thu", at(2026, 12, 31, 12)), ("w53_sun", at(2027, 1, 3, 12)), ("w01_mon", at(2027, 1, 4, 0, 30))]
+    d = keep(b, weekly=2)
+    assert d == {"w01_mon": 'weekly', "w53_sun": 'weekly', "w53_thu": None}
+
+def test_iso_week_starts_on_monday():
+    b = [("sun", at(2026, 10, 18, 23)), ("sat", at(2026, 10, 17, 12)), ("prev_sun", at(2026, 10, 11, 12))]
+    d = keep(b, weekly=2)
+    assert d == {"sun": 'weekly', "prev_sun": 'weekly', "sat": None}
+
+def test_month_rollover():
+    b = [("feb28", at(2027, 2, 28, 23, 59)), ("mar1", at(2027, 3, 1, 0, 1)), ("jan31", at(2027, 1, 31, 12)), ("jan1", at(2027, 1, 1))]
+    d = keep(b, monthly=3)
+    assert d == {"mar1": 'monthly', "feb28": 'monthly', "jan31": 'monthly', "jan1": None}
+
+def test_month_rollover_across_year_end():
+    b = [("jan", at(2027, 1, 1, 0, 0, 1)), ("dec", at(2026, 12, 31, 23, 59, 59)), ("nov", at(2026, 11, 15))]
+    d = keep(b, monthly=2)
+    assert d == {"jan": 'monthly', "dec": 'monthly', "nov": None}
+
+def test_long_hourly_history():
+    series = hourly_series(datetime(2026, 10, 18, 12, 30, tzinfo=UTC), 24 * 90)
+    d = keep(series, hourly=24, daily=7, weekly=4, monthly=6)
+    counts = Counter(d.values())
+    # 24 hours span today and yesterday, so daily adds 5 more days; weeks/months likewise skip covered periods
+    assert counts['hourly'] == 24 and counts['daily'] == 5
+    assert len(kept(d)) == sum(v for k, v in counts.items() if k)
+    assert kept(d) == sorted(set(kept(d)))
+
+def test_input_order_does_not_matter():
+    series = hourly_series(datetime(2026, 10, 18, 12, tzinfo=UTC), 100)
+    assert keep(series, hourly=5, daily=3) == keep(list(reversed(series)), hourly=5, daily=3)
+
+def test_retention_usage_sums_per_tier():
+    entries = [{'name': "a", 'size': 10}, {'name': "b", 'size': 20}, {'name': "c", 'size': None}]
+    usage = backup.retention_usage(entries, {"a": 'hourly', "b": None, "c": 'daily'})
+    assert usage == {'hourly': (1, 10), 'prune': (1, 20), 'daily': (1, 0)}
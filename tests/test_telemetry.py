@@ -0,0 +1,21 @@
+# --- VERSION & IDENTITY ---
+# MANAGER_VERSION = "v4.4.5 (Stable Release)"
+
+# tests/test_telemetry.py
+import pytest
+import telemetry
+
+@pytest.mark.parametrize("n,pct,expected", [
+    (1, 50, 1), (1, 95, 1),
+    (2, 50, 1), (2, 95, 2),
+    (4, 50, 2), (4, 75, 3),
+    (6, 50, 3), (6, 95, 6),
+    (10, 50, 5), (10, 90, 9),
+    (20, 50, 10), (20, 95, 19), (20, 100, 20),
+])
+def test_percentile_is_nearest_rank(n, pct, expected):
+    assert telemetry.percentile(list(range(1, n + 1)), pct) == expected
+
+def test_percentile_empty_and_zero():
+    assert telemetry.percentile([], 50) == 0.0
+    assert telemetry.percentile([3.0, 7.0], 0) == 3.0